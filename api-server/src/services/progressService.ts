@@ -46,11 +46,20 @@ export const progressService = {
     /**
      * Also support the legacy key format for backward compat with existing frontend polling.
      * The old Python backend used `video:progress:{videoId}` — we also check that.
+     * It now stores a JSON string under `video:progress:json:{videoId}`; the hash
+     * key is still written by the worker.
      */
     async getVideoProgress(videoId: string): Promise<JobProgress | null> {
         try {
             const redis = getRedis();
-            const data = await redis.hgetall(`video:progress:${videoId}`);
+            const key = `video:progress:${videoId}`;
+
+            const raw = await redis.get(`video:progress:json:${videoId}`);
+            if (raw) {
+                return JSON.parse(raw) as JobProgress;
+            }
+
+            const data = await redis.hgetall(key);
 
             if (!data || Object.keys(data).length === 0) {
                 return null;
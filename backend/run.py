@@ -21,6 +21,7 @@ def main():
         from src.services.db_service import init_database
         from src.services.cache_service import init_cache
         from src.services.cleanup_service import init_cleanup
+        from src.services.ffmpeg_utils_service import warm_ffmpeg_capabilities
         from src.app import create_app
 
         # Setup logging
@@ -42,6 +43,9 @@ def main():
         logger.info("Starting cleanup service...")
         init_cleanup()
 
+        # Probe FFmpeg encoders/GPU support in the background
+        warm_ffmpeg_capabilities()
+
         # Create Flask app
         logger.info("Creating Flask application...")
         app = create_app()
@@ -46,9 +46,17 @@ def create_app():
     @app.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint."""
+        from src.services.db_service import get_database
+        from src.services.cache_service import get_cache
+
+        mongodb_ok = get_database().connected
+        redis_ok = get_cache().connected
+
         return jsonify({
-            'status': 'healthy',
-            'service': 'yt-downloader'
+            'status': 'healthy' if mongodb_ok and redis_ok else 'degraded',
+            'service': 'yt-downloader',
+            'mongodb': mongodb_ok,
+            'redis': redis_ok
         }), 200
 
     @app.route('/', methods=['GET'])
@@ -42,11 +42,17 @@ class Config:
     # Application
     DOWNLOADS_DIR = os.getenv('DOWNLOADS_DIR', './downloads')
     UPLOADS_DIR = os.getenv('UPLOADS_DIR', './uploads')
+    YTDLP_CACHE_DIR = os.getenv('YTDLP_CACHE_DIR', './cache/yt-dlp')  # Player JS / signature cache
+    YTDLP_CONCURRENT_FRAGMENTS = int(os.getenv('YTDLP_CONCURRENT_FRAGMENTS', 8))  # Parallel fragment fetches
+    CLIP_CACHE_DIR = os.getenv('CLIP_CACHE_DIR', './cache/clips')  # Finished clips keyed by request
+    CLIP_CACHE_MAX_MB = int(os.getenv('CLIP_CACHE_MAX_MB', 2048))  # 0 disables the clip cache
     MAX_VIDEO_DURATION = int(os.getenv('MAX_VIDEO_DURATION', 3600))  # 1 hour
     MAX_UPLOAD_SIZE_MB = int(os.getenv('MAX_UPLOAD_SIZE_MB', 500))  # 500MB
     VIDEO_RETENTION_MINUTES = int(os.getenv('VIDEO_RETENTION_MINUTES', 30))
     CLEANUP_INTERVAL_MINUTES = int(os.getenv('CLEANUP_INTERVAL_MINUTES', 5))
     ENCODING_TIMEOUT_SECONDS = int(os.getenv('ENCODING_TIMEOUT_SECONDS', 1800))  # 30 minutes
+    ENCODING_THREADS = int(os.getenv('ENCODING_THREADS', os.cpu_count() or 0))  # 0 lets FFmpeg decide
+    ENCODE_NICE = int(os.getenv('ENCODE_NICE', 10))  # FFmpeg niceness; keeps web workers responsive
     ALLOWED_VIDEO_FORMATS = os.getenv(
         'ALLOWED_VIDEO_FORMATS',
         'mp4,avi,mkv,mov,flv,wmv,webm,m4v,mpg,mpeg,3gp'
@@ -146,6 +152,8 @@ def init_firebase_config():
         # Create necessary directories
         os.makedirs(Config.DOWNLOADS_DIR, exist_ok=True)
         os.makedirs(Config.UPLOADS_DIR, exist_ok=True)
+        os.makedirs(Config.YTDLP_CACHE_DIR, exist_ok=True)
+        os.makedirs(Config.CLIP_CACHE_DIR, exist_ok=True)
         os.makedirs(os.path.dirname(Config.LOG_FILE) if os.path.dirname(Config.LOG_FILE) else './logs', exist_ok=True)
 
         logger.info("Configuration initialized successfully")
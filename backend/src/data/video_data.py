@@ -18,6 +18,10 @@ from src.services.video_service import VideoService
 
 logger = logging.getLogger(__name__)
 
+# Downloads directory with its trailing separator, joined once at import;
+# generated filenames never contain a separator, so appending is enough
+_DOWNLOADS_PREFIX = os.path.join(Config.DOWNLOADS_DIR, '')
+
 
 class VideoData:
     """Data layer for video download operations."""
@@ -66,8 +70,7 @@ class VideoData:
             # Generate output path
             file_ext = format_pref if format_pref != 'best' else 'mp4'
             filename = f"{uuid.uuid4().hex}_{int(datetime.utcnow().timestamp())}.{file_ext}"
-            output_path = os.path.join(Config.DOWNLOADS_DIR, filename)
-            os.makedirs(Config.DOWNLOADS_DIR, exist_ok=True)
+            output_path = _DOWNLOADS_PREFIX + filename
 
             # Call service (pure logic, no database)
             success, file_path, error = VideoService.download_video_segment(
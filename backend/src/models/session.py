@@ -173,12 +173,10 @@ class Session:
             cache = get_cache()
             
             # Find all sessions for user
-            sessions = db.sessions.find({'user_id': ObjectId(user_id)})
+            sessions = db.sessions.find({'user_id': ObjectId(user_id)}, projection={'_id': 1})
             
-            # Delete from cache
-            for session in sessions:
-                session_id = str(session['_id'])
-                cache.delete_session(session_id)
+            # Delete from cache in a single command
+            cache.delete_sessions([str(session['_id']) for session in sessions])
             
             # Delete from MongoDB
             result = db.sessions.delete_many({'user_id': ObjectId(user_id)})
@@ -209,6 +209,14 @@ class Video:
                 {'$set': update_fields}
             )
 
+            if 'expires_at' in update_fields:
+                # TTL-indexed marker; its deletion triggers file cleanup
+                db.video_expirations.update_one(
+                    {'_id': ObjectId(video_id)},
+                    {'$set': {'expires_at': update_fields['expires_at']}},
+                    upsert=True
+                )
+
             if result.modified_count > 0:
 
                 logger.info(f"Video status updated to {status}: {video_id}")
@@ -224,15 +232,20 @@ class Video:
         """
         Find all expired videos that need cleanup.
 
+        Only the fields needed to remove the stored files are returned.
+
         Returns:
             List of expired video documents
         """
         try:
             db = get_database()
-            videos = list(db.videos.find({
-                'expires_at': {'$lte': datetime.utcnow()},
-                'file_path': {'$ne': None}  # Only videos that have files
-            }))
+            videos = list(db.videos.find(
+                {
+                    'expires_at': {'$lte': datetime.utcnow()},
+                    'file_path': {'$ne': None}  # Only videos that have files
+                },
+                projection={'file_path': 1, 'input_file_path': 1, 'storage_mode': 1}
+            ))
             return videos
 
         except Exception as e:
@@ -292,7 +305,8 @@ class Video:
         original_filename: str,
         input_file_path: str,
         video_codec: str = 'h264',
-        quality_preset: str = 'high'
+        quality_preset: str = 'high',
+        metadata: Optional[Dict] = None
     ) -> Optional[str]:
         """
         Create a new video encoding request.
@@ -303,6 +317,7 @@ class Video:
             input_file_path: Path to uploaded video file
             video_codec: Video codec to use (h264, h265, av1)
             quality_preset: Quality preset (lossless, high, medium)
+            metadata: ffprobe metadata of the input (duration, size, codecs)
 
         Returns:
             Encode ID as string if successful, None otherwise
@@ -317,6 +332,7 @@ class Video:
                 'input_file_path': input_file_path,
                 'video_codec': video_codec,
                 'quality_preset': quality_preset,
+                'metadata': metadata,
                 'audio_codec': 'aac',
                 'status': VideoStatus.PENDING,
                 'encoding_progress': 0,
@@ -92,7 +92,8 @@ def upload_video():
         encode_id = Video.create_encode_request(
             user_id=g.user_id,
             original_filename=original_filename,
-            input_file_path=upload_path
+            input_file_path=upload_path,
+            metadata=metadata
         )
 
         if not encode_id:
@@ -209,7 +210,8 @@ def start_encoding(encode_id):
             output_path=output_path,
             video_codec=video_codec,
             quality_preset=quality_preset,
-            encode_id=encode_id
+            encode_id=encode_id,
+            duration=(encode_request.get('metadata') or {}).get('duration')
         )
 
         if not success:
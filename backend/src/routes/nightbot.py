@@ -127,9 +127,9 @@ def clip_stream():
         # Actually, downloading "live" usually means specifying time range from the beginning.
         
         try:
-            # Parse start time (e.g. 2023-10-27T10:00:00Z)
-            # Handle Z or +00:00
-            start_dt = datetime.fromisoformat(start_time_iso.replace('Z', '+00:00'))
+            # Parse start time (e.g. 2023-10-27T10:00:00Z); fromisoformat
+            # accepts the Z suffix directly
+            start_dt = datetime.fromisoformat(start_time_iso)
             now_dt = datetime.now(start_dt.tzinfo)
             
             # Duration since start in seconds
@@ -306,7 +306,8 @@ def encode_public_video():
                     quality_preset=quality_preset,
                     use_gpu=True,
                     encode_id=job_id,  # For progress tracking
-                    progress_callback=None
+                    progress_callback=None,
+                    duration=actual_duration
                 )
 
                 if success and os.path.exists(output_path):
@@ -492,10 +493,8 @@ def get_rate_limit_status():
     Get current rate limit status (requires browser fingerprint header).
     """
     try:
-        remaining = RateLimiterService.get_remaining(g.client_id)
-        client_info = RateLimiterService.get_client_info(g.client_id)
-
-        used = client_info.get('count', 0) if client_info else 0
+        used = RateLimiterService.get_usage(g.client_id)
+        remaining = max(0, Config.PUBLIC_API_RATE_LIMIT - used)
 
         return jsonify({
             'limit': Config.PUBLIC_API_RATE_LIMIT,
@@ -1,7 +1,11 @@
 
 import json
+import zlib
+import time
+import base64
 import logging
-from typing import Optional, Any
+import threading
+from typing import Optional, Any, List, Dict, Tuple
 import redis
 from redis.exceptions import ConnectionError, RedisError
 
@@ -9,10 +13,36 @@ from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# zstd is preferred for large payloads, zlib is the stdlib fallback
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+# JSON payloads above this size are stored compressed. The client decodes
+# responses as text, so compressed bytes are base64-encoded behind a
+# control-character marker that plain values and JSON never start with.
+COMPRESSION_THRESHOLD_BYTES = 1024
+_ZSTD_MARKER = '\x01'
+_ZLIB_MARKER = '\x02'
+
+_JSON_CONTAINER_START = ('{', '[')
+
+_SESSION_PREFIX = "session:"
+
+# Until a ping succeeds, `connected` pings again at most this often, so
+# callers that skip Redis while it is down start using it once it is back
+RECONNECT_INTERVAL_SECONDS = 30
+
 class CacheService:
     
     _instance = None
     _client: Optional[redis.Redis] = None
+    _connected: bool = False
+    _last_ping: float = 0.0
+    _reconnect_lock = threading.Lock()
     
     def __new__(cls):
         
@@ -22,35 +52,107 @@ class CacheService:
     
     def connect(self):
         
+        redis_uri = Config.REDIS_URI
+        
         try:
             if self._client is None:
-                self._client = redis.from_url(
-                    Config.REDIS_URI,
-                    decode_responses=True,
-                    socket_connect_timeout=5
-                )
-                # Test connection
+                # Share the process-wide pool with ProgressCache when it
+                # points at the same server
+                from src.services import progress_cache
+                shared_pool = progress_cache.get_pool() if progress_cache.redis_uri == redis_uri else None
+                if shared_pool is not None:
+                    self._client = redis.Redis(connection_pool=shared_pool)
+                else:
+                    self._client = redis.from_url(
+                        redis_uri,
+                        decode_responses=True,
+                        socket_connect_timeout=5
+                    )
+            
+            if self._connected:
+                return
+            
+            # Test connection; the pool reconnects on demand, so a slow
+            # server only degrades health here instead of aborting startup
+            self._last_ping = time.monotonic()
+            try:
                 self._client.ping()
-                logger.info(f"Connected to Redis using URI: {Config.REDIS_URI}")
+            except ConnectionError as e:
+                logger.warning(f"Redis ping failed, continuing unhealthy: {str(e)}")
+                return
+            
+            self._connected = True
+            logger.info(f"Connected to Redis using URI: {redis_uri}")
                 
-        except ConnectionError as e:
-            logger.error(f"Failed to connect to Redis: {str(e)}")
-            raise
         except Exception as e:
             logger.error(f"Redis connection error: {str(e)}")
             raise
     
+    def _reconnect(self):
+        
+        # One caller pings at a time; the others report the current state
+        if not self._reconnect_lock.acquire(blocking=False):
+            return
+        try:
+            if self._connected or time.monotonic() - self._last_ping < RECONNECT_INTERVAL_SECONDS:
+                return
+            self._last_ping = time.monotonic()
+            try:
+                self._client.ping()
+            except RedisError as e:
+                logger.debug(f"Redis still unreachable: {str(e)}")
+                return
+            
+            self._connected = True
+            logger.info("Reconnected to Redis")
+        finally:
+            self._reconnect_lock.release()
+    
+    @property
+    def connected(self) -> bool:
+        
+        if not self._connected and self._client is not None:
+            self._reconnect()
+        return self._connected
+    
+    @staticmethod
+    def _decode(value: Optional[str]) -> Optional[Any]:
+        
+        if not value:
+            return None
+        if value[0] in (_ZSTD_MARKER, _ZLIB_MARKER):
+            value = CacheService._decompress(value)
+        # Only dicts/lists are JSON-encoded by set(); anything else
+        # is returned as stored without attempting a parse
+        if value[0] in _JSON_CONTAINER_START:
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                return value
+        return value
+    
+    @staticmethod
+    def _compress(raw: bytes) -> str:
+        
+        if zstandard is not None:
+            return _ZSTD_MARKER + base64.b64encode(_zstd_compressor.compress(raw)).decode('ascii')
+        return _ZLIB_MARKER + base64.b64encode(zlib.compress(raw)).decode('ascii')
+    
+    @staticmethod
+    def _decompress(value: str) -> str:
+        
+        data = base64.b64decode(value[1:])
+        if value[0] == _ZSTD_MARKER:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this cached value")
+            return _zstd_decompressor.decompress(data).decode('utf-8')
+        return zlib.decompress(data).decode('utf-8')
+    
     def get(self, key: str) -> Optional[Any]:
         
         try:
             value = self._client.get(key)
-            if value:
-                # Try to parse as JSON
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    return value
-            return None
+            return self._decode(value)
             
         except RedisError as e:
             logger.warning(f"Redis get error for key {key}: {str(e)}")
@@ -59,12 +161,36 @@ class CacheService:
             logger.error(f"Cache get error: {str(e)}")
             return None
     
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        
+        if not keys:
+            return []
+        try:
+            return [self._decode(value) for value in self._client.mget(keys)]
+            
+        except RedisError as e:
+            logger.warning(f"Redis get error for {len(keys)} keys: {str(e)}")
+            return [None] * len(keys)
+        except Exception as e:
+            logger.error(f"Cache get error: {str(e)}")
+            return [None] * len(keys)
+    
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        
+        # Serialize value if it's a dict or list
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+            # Measured on the encoded payload, which is what Redis stores
+            raw = value.encode('utf-8')
+            if len(raw) > COMPRESSION_THRESHOLD_BYTES:
+                value = CacheService._compress(raw)
+        return value
+    
     def set(self, key: str, value: Any, expiration: Optional[int] = None) -> bool:
         
         try:
-            # Serialize value if it's a dict or list
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+            value = self._encode(value)
             
             if expiration:
                 self._client.setex(key, expiration, value)
@@ -79,10 +205,30 @@ class CacheService:
             logger.error(f"Cache set error: {str(e)}")
             return False
     
+    def set_many(self, items: Dict[str, Any], expiration: Optional[int] = None) -> bool:
+        
+        if not items:
+            return True
+        try:
+            # One pipelined round trip for every key
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, self._encode(value), ex=expiration)
+            pipe.execute()
+            return True
+            
+        except RedisError as e:
+            logger.warning(f"Redis set error for {len(items)} keys: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Cache set error: {str(e)}")
+            return False
+    
     def delete(self, key: str) -> bool:
         
         try:
-            self._client.delete(key)
+            # UNLINK reclaims memory in a background thread on the server
+            self._client.unlink(key)
             return True
             
         except RedisError as e:
@@ -92,6 +238,21 @@ class CacheService:
             logger.error(f"Cache delete error: {str(e)}")
             return False
     
+    def delete_many(self, keys: List[str]) -> bool:
+        
+        if not keys:
+            return True
+        try:
+            self._client.unlink(*keys)
+            return True
+            
+        except RedisError as e:
+            logger.warning(f"Redis delete error for {len(keys)} keys: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Cache delete error: {str(e)}")
+            return False
+    
     def exists(self, key: str) -> bool:
         
         try:
@@ -103,23 +264,99 @@ class CacheService:
             logger.error(f"Cache exists error: {str(e)}")
             return False
     
+    def increment_hash(
+        self,
+        key: str,
+        increments: Dict[str, int],
+        expiration: Optional[int] = None,
+        defaults: Optional[Dict[str, str]] = None
+    ) -> Optional[List[int]]:
+        
+        # HINCRBY per field plus optional HSETNX/EXPIRE in one pipelined round
+        # trip; defaults only fill fields that are not set yet. Returns the
+        # new counter values in the order given
+        results = self.increment_hashes([(key, increments, expiration, defaults)])
+        return results[0] if results else None
+    
+    def increment_hashes(
+        self,
+        updates: List[Tuple[str, Dict[str, int], Optional[int], Optional[Dict[str, str]]]]
+    ) -> Optional[List[List[int]]]:
+        
+        # Batched increment_hash: (key, increments, expiration, defaults) per
+        # entry, all in a single pipeline; returns new counters per entry
+        if not updates:
+            return []
+        
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            spans = []
+            queued = 0
+            for key, increments, expiration, defaults in updates:
+                for field, amount in increments.items():
+                    pipe.hincrby(key, field, amount)
+                spans.append((queued, len(increments)))
+                queued += len(increments)
+                for field, value in (defaults or {}).items():
+                    pipe.hsetnx(key, field, value)
+                    queued += 1
+                if expiration:
+                    pipe.expire(key, expiration)
+                    queued += 1
+            replies = pipe.execute()
+            return [replies[start:start + count] for start, count in spans]
+            
+        except RedisError as e:
+            logger.warning(f"Redis increment error for {len(updates)} key(s): {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Cache increment error: {str(e)}")
+            return None
+    
+    def get_hash_field(self, key: str, field: str) -> Optional[str]:
+        
+        try:
+            return self._client.hget(key, field)
+        except RedisError as e:
+            logger.warning(f"Redis hget error for key {key}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Cache hget error: {str(e)}")
+            return None
+    
+    def get_hash(self, key: str) -> Optional[Dict[str, str]]:
+        
+        try:
+            return self._client.hgetall(key) or None
+        except RedisError as e:
+            logger.warning(f"Redis hgetall error for key {key}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Cache hgetall error: {str(e)}")
+            return None
+    
     def get_session(self, session_id: str) -> Optional[dict]:
         
-        return self.get(f"session:{session_id}")
+        return self.get(_SESSION_PREFIX + session_id)
     
     def set_session(self, session_id: str, session_data: dict, expiration: int) -> bool:
         
-        return self.set(f"session:{session_id}", session_data, expiration)
+        return self.set(_SESSION_PREFIX + session_id, session_data, expiration)
     
     def delete_session(self, session_id: str) -> bool:
         
-        return self.delete(f"session:{session_id}")
+        return self.delete(_SESSION_PREFIX + session_id)
+    
+    def delete_sessions(self, session_ids: List[str]) -> bool:
+        
+        return self.delete_many([_SESSION_PREFIX + session_id for session_id in session_ids])
     
     def close(self):
         
         if self._client:
             self._client.close()
             self._client = None
+            self._connected = False
             logger.info("Redis connection closed")
 
 # Global cache service instance
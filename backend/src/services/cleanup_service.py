@@ -1,6 +1,8 @@
 
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 
@@ -9,11 +11,73 @@ from src.models.video import Video
 
 logger = logging.getLogger(__name__)
 
+# Safety-net sweep interval while the change stream is delivering expiries
+RECOVERY_SWEEP_HOURS = 24
+
 class CleanupService:
 
     def __init__(self):
         self.scheduler = BackgroundScheduler()
         self.is_running = False
+        # Created by start(), since stop() shuts it down
+        self._executor = None
+        self._watcher = None
+        self._stop_event = threading.Event()
+
+    def _delete_video_files(self, video):
+
+        file_path = video.get('file_path')
+        input_file_path = video.get('input_file_path')
+
+        # Delete output file from filesystem or S3
+        storage_mode = video.get('storage_mode', 'local')
+
+        if storage_mode == 's3' and file_path:
+            from src.services.storage_service import StorageService
+            if StorageService.delete_file(file_path):
+                 logger.info(f"Deleted expired video from S3: {file_path}")
+            else:
+                 logger.error(f"Failed to delete expired video from S3: {file_path}")
+        elif file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                logger.info(f"Deleted expired video file: {file_path}")
+            except OSError as e:
+                logger.error(f"Failed to delete file {file_path}: {str(e)}")
+
+        # Delete input file from filesystem (for uploaded videos)
+        if input_file_path and os.path.exists(input_file_path):
+            try:
+                os.remove(input_file_path)
+                logger.info(f"Deleted expired input file: {input_file_path}")
+            except OSError as e:
+                logger.error(f"Failed to delete input file {input_file_path}: {str(e)}")
+
+    def _mark_expired(self, video_ids):
+
+        # Update database to remove file_path
+        from src.services.db_service import get_database
+        db = get_database()
+        db.videos.update_many(
+            {'_id': {'$in': video_ids}},
+            {
+                '$set': {
+                    'file_path': None,
+                    'input_file_path': None,
+                    'status': 'expired'
+                }
+            }
+        )
+
+    def _expire_video_by_id(self, video_id):
+
+        try:
+            video = Video.find_by_id(str(video_id))
+            if video and video.get('file_path'):
+                self._delete_video_files(video)
+                self._mark_expired([video['_id']])
+        except Exception as e:
+            logger.error(f"Failed to expire video {video_id}: {str(e)}")
 
     def cleanup_expired_videos(self):
 
@@ -27,70 +91,62 @@ class CleanupService:
                 logger.debug("No expired videos found")
                 return
 
-            deleted_count = 0
-
-            for video in expired_videos:
-                video_id = str(video['_id'])
-                file_path = video.get('file_path')
-                input_file_path = video.get('input_file_path')
-
-                # Delete output file from filesystem or S3
-                storage_mode = video.get('storage_mode', 'local')
-
-                if storage_mode == 's3' and file_path:
-                    from src.services.storage_service import StorageService
-                    if StorageService.delete_file(file_path):
-                         logger.info(f"Deleted expired video from S3: {file_path}")
-                    else:
-                         logger.error(f"Failed to delete expired video from S3: {file_path}")
-                elif file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Deleted expired video file: {file_path}")
-                    except OSError as e:
-                        logger.error(f"Failed to delete file {file_path}: {str(e)}")
-
-                # Delete input file from filesystem (for uploaded videos)
-                if input_file_path and os.path.exists(input_file_path):
-                    try:
-                        os.remove(input_file_path)
-                        logger.info(f"Deleted expired input file: {input_file_path}")
-                    except OSError as e:
-                        logger.error(f"Failed to delete input file {input_file_path}: {str(e)}")
-
-                # Update database to remove file_path
-                from src.services.db_service import get_database
-                from bson import ObjectId
-                db = get_database()
-                db.videos.update_one(
-                    {'_id': ObjectId(video_id)},
-                    {
-                        '$set': {
-                            'file_path': None,
-                            'input_file_path': None,
-                            'status': 'expired'
-                        }
-                    }
-                )
-
-                deleted_count += 1
-
-            logger.info(f"Cleanup completed: {deleted_count} video(s) processed")
+            # File and S3 deletes are pure I/O, so run them concurrently and
+            # record the videos whose files were handled with a single update
+            futures = {
+                self._executor.submit(self._delete_video_files, video): video
+                for video in expired_videos
+            }
+            expired_ids = []
+            for future in as_completed(futures):
+                video = futures[future]
+                try:
+                    future.result()
+                    expired_ids.append(video['_id'])
+                except Exception as e:
+                    logger.error(f"Failed to expire video {video['_id']}: {str(e)}")
+
+            if expired_ids:
+                self._mark_expired(expired_ids)
+
+            logger.info(f"Cleanup completed: {len(expired_ids)} video(s) processed")
 
         except Exception as e:
             logger.error(f"Cleanup task error: {str(e)}")
 
-    def cleanup_failed_sessions(self):
+    def _set_sweep_interval(self, **interval):
 
         try:
-            from src.models.session import Session
-            deleted_count = Session.cleanup_expired()
+            self.scheduler.reschedule_job('cleanup_videos', trigger='interval', **interval)
+        except Exception as e:
+            logger.warning(f"Could not reschedule video cleanup: {str(e)}")
 
-            if deleted_count > 0:
-                logger.info(f"Cleaned up {deleted_count} expired sessions")
+    def _watch_expirations(self):
+
+        # The TTL monitor deletes a video's expiration marker once it is due;
+        # react to those deletes instead of polling the videos collection
+        from src.services.db_service import get_database
+
+        try:
+            db = get_database()
+            pipeline = [{'$match': {'operationType': 'delete'}}]
+            with db.video_expirations.watch(pipeline) as stream:
+                self._set_sweep_interval(hours=RECOVERY_SWEEP_HOURS)
+                logger.info("Watching video expirations via change stream")
+
+                while not self._stop_event.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is None:
+                        continue
+                    video_id = change['documentKey']['_id']
+                    self._executor.submit(self._expire_video_by_id, video_id)
 
         except Exception as e:
-            logger.error(f"Session cleanup error: {str(e)}")
+            # Change streams need a replica set; keep polling without one
+            logger.warning(f"Video expiration change stream unavailable, using periodic sweep: {str(e)}")
+
+        if not self._stop_event.is_set():
+            self._set_sweep_interval(minutes=Config.CLEANUP_INTERVAL_MINUTES)
 
     def start(self):
 
@@ -98,29 +154,35 @@ class CleanupService:
             logger.warning("Cleanup service is already running")
             return
 
+        interval_minutes = Config.CLEANUP_INTERVAL_MINUTES
+
         try:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cleanup')
+
             # Schedule video cleanup every N minutes
             self.scheduler.add_job(
                 self.cleanup_expired_videos,
                 'interval',
-                minutes=Config.CLEANUP_INTERVAL_MINUTES,
+                minutes=interval_minutes,
                 id='cleanup_videos',
                 replace_existing=True
             )
 
-            # Schedule session cleanup every hour
-            self.scheduler.add_job(
-                self.cleanup_failed_sessions,
-                'interval',
-                hours=1,
-                id='cleanup_sessions',
-                replace_existing=True
-            )
+            # Expired sessions are removed by the MongoDB TTL index on
+            # sessions.expires_at, so only video files need a periodic sweep
 
             self.scheduler.start()
             self.is_running = True
 
-            logger.info(f"Cleanup service started (interval: {Config.CLEANUP_INTERVAL_MINUTES} minutes)")
+            self._stop_event.clear()
+            self._watcher = threading.Thread(
+                target=self._watch_expirations,
+                name='video-expiration-watcher',
+                daemon=True
+            )
+            self._watcher.start()
+
+            logger.info(f"Cleanup service started (interval: {interval_minutes} minutes)")
 
         except Exception as e:
             logger.error(f"Failed to start cleanup service: {str(e)}")
@@ -128,11 +190,16 @@ class CleanupService:
 
     def stop(self):
 
+        self._stop_event.set()
+
         if self.scheduler.running:
             self.scheduler.shutdown()
             self.is_running = False
             logger.info("Cleanup service stopped")
 
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
 # Global cleanup service instance
 cleanup_service = CleanupService()
 
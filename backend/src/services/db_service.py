@@ -1,19 +1,31 @@
 
 import logging
+import threading
+import time
 from typing import Optional
-from pymongo import MongoClient, ASCENDING, DESCENDING
+import pymongo
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
 from pymongo.database import Database
-from pymongo.errors import ConnectionFailure, OperationFailure
+from pymongo.errors import OperationFailure, PyMongoError
 
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Until a ping succeeds, `connected` pings again at most this often, so a
+# server that comes up after startup is picked up (and indexed) without a
+# restart
+RECONNECT_INTERVAL_SECONDS = 30
+RECONNECT_PING_TIMEOUT_SECONDS = 2
+
 class DatabaseService:
     
     _instance = None
     _client: Optional[MongoClient] = None
     _db: Optional[Database] = None
+    _connected: bool = False
+    _last_ping: float = 0.0
+    _reconnect_lock = threading.Lock()
     
     def __new__(cls):
         
@@ -23,44 +35,102 @@ class DatabaseService:
     
     def connect(self):
         
+        mongodb_uri, db_name = Config.MONGODB_URI, Config.MONGODB_DB_NAME
+        
         try:
             if self._client is None:
                 self._client = MongoClient(
-                    Config.MONGODB_URI,
-                    serverSelectionTimeoutMS=5000
+                    mongodb_uri,
+                    serverSelectionTimeoutMS=5000,
+                    maxIdleTimeMS=60000
                 )
-                # Test connection
-                self._client.admin.command('ping')
-                self._db = self._client[Config.MONGODB_DB_NAME]
-                logger.info(f"Connected to MongoDB database: {Config.MONGODB_DB_NAME}")
-                
-                # Initialize indexes
-                self._create_indexes()
+                self._db = self._client[db_name]
+            
+            if self._connected:
+                return
+            
+            # Test connection; MongoClient connects lazily, so a slow server
+            # only degrades health here instead of aborting startup
+            try:
+                self._ping()
+            except PyMongoError as e:
+                logger.warning(f"MongoDB ping failed, continuing unhealthy: {str(e)}")
+                return
+            
+            self._connected = True
+            logger.info(f"Connected to MongoDB database: {db_name}")
+            
+            # Initialize indexes
+            self._create_indexes()
                 
-        except ConnectionFailure as e:
-            logger.error(f"Failed to connect to MongoDB: {str(e)}")
-            raise
         except Exception as e:
             logger.error(f"Database connection error: {str(e)}")
             raise
     
+    def _ping(self, timeout: Optional[float] = None):
+        
+        self._last_ping = time.monotonic()
+        if timeout is None:
+            self._client.admin.command('ping')
+        else:
+            with pymongo.timeout(timeout):
+                self._client.admin.command('ping')
+    
+    def _reconnect(self):
+        
+        # One caller pings at a time; the others report the current state
+        if not self._reconnect_lock.acquire(blocking=False):
+            return
+        try:
+            if self._connected or time.monotonic() - self._last_ping < RECONNECT_INTERVAL_SECONDS:
+                return
+            try:
+                self._ping(RECONNECT_PING_TIMEOUT_SECONDS)
+            except PyMongoError as e:
+                logger.debug(f"MongoDB still unreachable: {str(e)}")
+                return
+            
+            self._connected = True
+            logger.info("Reconnected to MongoDB")
+            # The TTL indexes the session and video expiry rely on
+            self._create_indexes()
+        finally:
+            self._reconnect_lock.release()
+    
+    @property
+    def connected(self) -> bool:
+        
+        if not self._connected and self._client is not None:
+            self._reconnect()
+        return self._connected
+    
     def _create_indexes(self):
         
         try:
             # Users collection indexes
-            self._db.users.create_index([("email", ASCENDING)], unique=True)
-            self._db.users.create_index([("created_at", DESCENDING)])
+            self._db.users.create_indexes([
+                IndexModel([("email", ASCENDING)], unique=True),
+                IndexModel([("created_at", DESCENDING)]),
+            ])
             
             # Sessions collection indexes
-            self._db.sessions.create_index([("user_id", ASCENDING)])
-            self._db.sessions.create_index([("token", ASCENDING)], unique=True)
-            self._db.sessions.create_index([("expires_at", ASCENDING)])
+            self._db.sessions.create_indexes([
+                IndexModel([("user_id", ASCENDING)]),
+                IndexModel([("token", ASCENDING)], unique=True),
+            ])
+            self._create_ttl_index(self._db.sessions, "expires_at")
             
             # Videos collection indexes
-            self._db.videos.create_index([("user_id", ASCENDING)])
-            self._db.videos.create_index([("status", ASCENDING)])
-            self._db.videos.create_index([("created_at", DESCENDING)])
-            self._db.videos.create_index([("expires_at", ASCENDING)])
+            self._db.videos.create_indexes([
+                IndexModel([("user_id", ASCENDING)]),
+                IndexModel([("status", ASCENDING)]),
+                IndexModel([("created_at", DESCENDING)]),
+                IndexModel([("expires_at", ASCENDING)]),
+            ])
+            
+            # Expiration markers, one per completed video, deleted by the TTL
+            # monitor when due so the cleanup service can react to the delete
+            self._create_ttl_index(self._db.video_expirations, "expires_at")
             
             logger.info("Database indexes created successfully")
             
@@ -69,6 +139,21 @@ class DatabaseService:
         except Exception as e:
             logger.error(f"Failed to create indexes: {str(e)}")
     
+    def _create_ttl_index(self, collection, field: str):
+        
+        # Documents are removed by the server once `field` is in the past
+        try:
+            collection.create_index([(field, ASCENDING)], expireAfterSeconds=0)
+        except OperationFailure as e:
+            if e.code != 85:  # IndexOptionsConflict
+                raise
+            # Convert the pre-existing plain index into a TTL index in place
+            self._db.command(
+                'collMod', collection.name,
+                index={'keyPattern': {field: 1}, 'expireAfterSeconds': 0}
+            )
+            logger.info(f"Converted {collection.name}.{field} index to TTL")
+    
     def get_db(self) -> Database:
         
         if self._db is None:
@@ -81,6 +166,7 @@ class DatabaseService:
             self._client.close()
             self._client = None
             self._db = None
+            self._connected = False
             logger.info("Database connection closed")
     
     @property
@@ -97,6 +183,11 @@ class DatabaseService:
     def videos(self):
         
         return self.get_db().videos
+    
+    @property
+    def video_expirations(self):
+        
+        return self.get_db().video_expirations
 
 # Global database service instance
 db_service = DatabaseService()
@@ -1,41 +1,69 @@
 
 import os
+import asyncio
 import logging
 import subprocess
 import json
-import re
 import time
-from typing import Optional, Tuple, Dict, Callable
-from datetime import datetime
-from pathlib import Path
+import threading
+import tempfile
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, Callable, List
 
 from src.config import Config
 from src.models.video import Video, VideoStatus
 from src.services import ffmpeg_utils_service
+from src.services.progress_cache import ProgressCache
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# NVENC rate-distortion tuning: with adaptive quantization and lookahead,
+# preset p5 gets close to p7 quality at roughly twice the throughput.
+# These are dropped for FFmpeg/driver builds whose encoder lacks them.
+NVENC_QUALITY_ARGS = [
+    '-tune', 'hq',
+    '-spatial_aq', '1',
+    '-temporal_aq', '1',
+    '-rc-lookahead', '20',
+    '-b_ref_mode', 'middle',
+]
+NVENC_OPTIONAL_FLAGS = frozenset(NVENC_QUALITY_ARGS[::2])
+
 # GPU Encoder configurations
 GPU_ENCODER_CONFIGS = {
     'h264': {
-        'nvenc': {'encoder': 'h264_nvenc', 'lossless': ['-preset', 'p7', '-cq', '19', '-b:v', '0'], 
-                  'high': ['-preset', 'p5', '-cq', '23', '-b:v', '0']},
+        'nvenc': {'encoder': 'h264_nvenc', 'lossless': ['-preset', 'p5', '-rc', 'vbr', '-cq', '19', '-b:v', '0'] + NVENC_QUALITY_ARGS,
+                  'high': ['-preset', 'p5', '-rc', 'vbr', '-cq', '23', '-b:v', '0'] + NVENC_QUALITY_ARGS},
         'amf': {'encoder': 'h264_amf', 'lossless': ['-quality', 'quality', '-qp_i', '18', '-qp_p', '18'],
                 'high': ['-quality', 'balanced', '-qp_i', '23', '-qp_p', '23']},
         'qsv': {'encoder': 'h264_qsv', 'lossless': ['-preset', 'veryslow', '-global_quality', '18'],
                 'high': ['-preset', 'medium', '-global_quality', '23']},
     },
     'h265': {
-        'nvenc': {'encoder': 'hevc_nvenc', 'lossless': ['-preset', 'p7', '-cq', '20', '-b:v', '0'],
-                  'high': ['-preset', 'p5', '-cq', '25', '-b:v', '0']},
+        'nvenc': {'encoder': 'hevc_nvenc', 'lossless': ['-preset', 'p5', '-rc', 'vbr', '-cq', '20', '-b:v', '0'] + NVENC_QUALITY_ARGS,
+                  'high': ['-preset', 'p5', '-rc', 'vbr', '-cq', '25', '-b:v', '0'] + NVENC_QUALITY_ARGS},
         'amf': {'encoder': 'hevc_amf', 'lossless': ['-quality', 'quality', '-qp_i', '20', '-qp_p', '20'],
                 'high': ['-quality', 'balanced', '-qp_i', '25', '-qp_p', '25']},
         'qsv': {'encoder': 'hevc_qsv', 'lossless': ['-preset', 'veryslow', '-global_quality', '20'],
                 'high': ['-preset', 'medium', '-global_quality', '25']},
     },
     'av1': {
-        'nvenc': {'encoder': 'av1_nvenc', 'lossless': ['-cq', '18', '-b:v', '0'],
-                  'high': ['-cq', '23', '-b:v', '0']},
+        'nvenc': {'encoder': 'av1_nvenc', 'lossless': ['-preset', 'p5', '-rc', 'vbr', '-cq', '18', '-b:v', '0'] + NVENC_QUALITY_ARGS,
+                  'high': ['-preset', 'p5', '-rc', 'vbr', '-cq', '23', '-b:v', '0'] + NVENC_QUALITY_ARGS},
         'amf': {'encoder': 'av1_amf', 'lossless': ['-cq', '18', '-b:v', '0'],
                 'high': ['-cq', '23', '-b:v', '0']},
         'qsv': {'encoder': 'av1_qsv', 'lossless': ['-cq', '18', '-b:v', '0'],
@@ -43,6 +71,35 @@ GPU_ENCODER_CONFIGS = {
     }
 }
 
+# Encoder name -> GPU_ENCODER_CONFIGS key ('h264_nvenc' -> 'nvenc')
+_GPU_ENCODER_KINDS = {
+    config['encoder']: kind
+    for codec_configs in GPU_ENCODER_CONFIGS.values()
+    for kind, config in codec_configs.items()
+}
+
+# Every encoder detect_gpu_encoder can return must have a config here
+assert all(
+    encoder in _GPU_ENCODER_KINDS
+    for candidates in ffmpeg_utils_service.GPU_ENCODER_CANDIDATES.values()
+    for encoder, _ in candidates
+), "GPU_ENCODER_CONFIGS is missing an encoder probed by detect_gpu_encoder"
+
+# Hardware decode + GPU-side pixel format conversion per encoder family.
+# AMF is left on CPU decode: its d3d11va frames need an extra hwmap step.
+HWACCEL_CONFIGS = {
+    'nvenc': {
+        'hwaccel': 'cuda',
+        'input_args': ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'],
+        'filter': 'scale_cuda=format=nv12',
+    },
+    'qsv': {
+        'hwaccel': 'qsv',
+        'input_args': ['-hwaccel', 'qsv', '-hwaccel_output_format', 'qsv'],
+        'filter': 'vpp_qsv=format=nv12',
+    },
+}
+
 # CPU Codec configurations
 CPU_CODEC_CONFIGS = {
     'h264': {
@@ -63,6 +120,8 @@ CPU_CODEC_CONFIGS = {
     },
     'av1': {
         'encoder': 'libsvtav1',
+        # Visual-quality tuning with a cheaper decode for playback devices
+        'params': 'tune=0:fast-decode=1:enable-overlays=1:film-grain=0',
         'quality_presets': {
             'lossless': {'crf': '18', 'preset': '6'},
             'high': {'crf': '23', 'preset': '8'},
@@ -71,6 +130,19 @@ CPU_CODEC_CONFIGS = {
     }
 }
 
+# Used only when FFmpeg was built without the primary CPU encoder
+CPU_FALLBACK_CODEC_CONFIGS = {
+    'av1': {
+        'encoder': 'libaom-av1',
+        'args': ['-b:v', '0', '-row-mt', '1'],
+        'quality_presets': {
+            'lossless': {'crf': '18', 'cpu-used': '4'},
+            'high': {'crf': '23', 'cpu-used': '6'},
+            'medium': {'crf': '28', 'cpu-used': '8'}
+        }
+    }
+}
+
 # Audio encoding configuration
 AUDIO_CONFIG = {
     'codec': 'aac',
@@ -78,6 +150,315 @@ AUDIO_CONFIG = {
     'sample_rate': '48000'
 }
 
+# Audio and container arguments shared by every encode
+OUTPUT_ARGS = (
+    '-c:a', AUDIO_CONFIG['codec'],
+    '-b:a', AUDIO_CONFIG['bitrate'],
+    '-ar', AUDIO_CONFIG['sample_rate'],
+    '-movflags', '+faststart',
+)
+
+def _build_cpu_argv(codec_config: Dict, preset_config: Dict, threads: int) -> Tuple[str, ...]:
+    
+    args = ['-c:v', codec_config['encoder'], '-crf', preset_config['crf']]
+    for option in ('preset', 'cpu-used'):
+        if option in preset_config:
+            args.extend([f'-{option}', preset_config[option]])
+    args.extend(codec_config.get('args', []))
+    
+    # Size encoder thread pools to the machine; FFmpeg's defaults
+    # leave cores idle for x265 and SVT-AV1
+    svtav1_params = [codec_config['params']] if 'params' in codec_config else []
+    if threads:
+        args.extend(['-threads', str(threads)])
+        if codec_config['encoder'] == 'libsvtav1':
+            svtav1_params.append(f'lp={min(threads, 16)}:tile-columns=2:tile-rows=1')
+        elif codec_config['encoder'] == 'libx265':
+            args.extend(['-x265-params', f'pools={threads}'])
+    if svtav1_params:
+        args.extend(['-svtav1-params', ':'.join(svtav1_params)])
+    
+    return (*args, *OUTPUT_ARGS, '-pix_fmt', 'yuv420p')
+
+# Output options for a poster frame written alongside the MP4, for use as an
+# extra_outputs entry: {'path': 'thumb.jpg', 'args': THUMBNAIL_OUTPUT_ARGS}
+THUMBNAIL_OUTPUT_ARGS = ('-map', '0:v:0', '-frames:v', '1', '-q:v', '2')
+
+# Everything after the input for each (codec, quality preset, CPU encoder),
+# built once at import so an encode only splices in its paths
+_ARGV_TEMPLATES = {
+    (codec, preset, codec_config['encoder']): _build_cpu_argv(codec_config, preset_config, Config.ENCODING_THREADS)
+    for configs in (CPU_CODEC_CONFIGS, CPU_FALLBACK_CODEC_CONFIGS)
+    for codec, codec_config in configs.items()
+    for preset, preset_config in codec_config['quality_presets'].items()
+}
+
+@lru_cache(maxsize=None)
+def _cpu_argv_for_threads(video_codec: str, quality_preset: str, encoder: str, threads: int) -> Optional[Tuple[str, ...]]:
+    
+    # Like _ARGV_TEMPLATES, for encodes sharing the machine with siblings
+    for configs in (CPU_CODEC_CONFIGS, CPU_FALLBACK_CODEC_CONFIGS):
+        codec_config = configs.get(video_codec)
+        if codec_config and codec_config['encoder'] == encoder:
+            preset_config = codec_config['quality_presets'].get(quality_preset)
+            return _build_cpu_argv(codec_config, preset_config, threads) if preset_config else None
+    return None
+
+# Lines of FFmpeg stderr kept for error reporting
+STDERR_TAIL_LINES = 200
+
+# Bytes requested per os.read() on FFmpeg's pipes
+PIPE_READ_SIZE = 65536
+
+# Minimum time between published encode progress snapshots
+PROGRESS_INTERVAL_NS = 500_000_000
+
+# Seconds between progress cache writes during an encode
+PROGRESS_FLUSH_INTERVAL = 0.5
+
+# ffprobe codec_name of each target codec, for stream-copy detection
+PROBE_CODEC_NAMES = {
+    'h264': 'h264',
+    'h265': 'hevc',
+    'av1': 'av1'
+}
+
+# Output args when the input already is the requested codec in MP4
+STREAM_COPY_ARGS = (
+    '-map', '0:v:0',
+    '-map', '0:a:0?',
+    '-c', 'copy',
+    '-movflags', '+faststart',
+)
+
+# Inputs longer than this (seconds) are split and encoded in parallel
+PARALLEL_ENCODE_MIN_DURATION = 300
+
+# Default number of chunks for a parallel encode
+PARALLEL_ENCODE_SEGMENTS = 4
+
+# Single ffprobe query shared by validation and metadata extraction
+FFPROBE_ENTRIES = 'format=duration,size,format_name:stream=codec_name,codec_type,width,height,bit_rate,pix_fmt'
+
+@lru_cache(maxsize=512)
+def _ffprobe_json(file_path: str, mtime_ns: int, size: int) -> Optional[Dict]:
+    
+    # mtime_ns and size are part of the cache key so a rewritten file is re-probed
+    ffmpeg_path, _ = ffmpeg_utils_service.get_ffmpeg_path()
+    if not ffmpeg_path:
+        return None
+    
+    ffprobe_path = ffmpeg_utils_service.get_ffprobe_path(ffmpeg_path) or 'ffprobe'
+    
+    cmd = [
+        ffprobe_path,
+        '-v', 'error',
+        '-show_entries', FFPROBE_ENTRIES,
+        '-of', 'json',
+        file_path
+    ]
+    
+    # Raw bytes go straight to the JSON parser without a text decode
+    result = subprocess.run(cmd, capture_output=True, timeout=15)
+    
+    if result.returncode != 0:
+        logger.error(f"ffprobe error: {result.stderr.decode(errors='replace')}")
+        return None
+    
+    return _json_loads(result.stdout)
+
+def probe_file(file_path: str) -> Optional[Dict]:
+    
+    stat = os.stat(file_path)
+    return _ffprobe_json(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+def _iter_lines(stream):
+    
+    # Read the raw pipe in large chunks and split lines as bytes, avoiding
+    # per-line text decoding for output that is mostly thrown away
+    fd = stream.fileno()
+    buffer = b''
+    while True:
+        chunk = os.read(fd, PIPE_READ_SIZE)
+        if not chunk:
+            break
+        lines = (buffer + chunk).split(b'\n')
+        buffer = lines.pop()
+        yield from lines
+    if buffer:
+        yield buffer
+
+def _drain_stream(stream, sink: deque):
+    
+    for line in _iter_lines(stream):
+        sink.append(line + b'\n')
+
+def _deprioritize(pid: int):
+    
+    # Lower FFmpeg's CPU/IO priority and keep it off the last core so a
+    # saturating encode cannot starve the web workers
+    if psutil is None or not Config.ENCODE_NICE:
+        return
+    try:
+        process = psutil.Process(pid)
+        process.nice(Config.ENCODE_NICE)
+        if hasattr(psutil, 'IOPRIO_CLASS_BE'):
+            process.ionice(psutil.IOPRIO_CLASS_BE, 7)
+        cpu_count = os.cpu_count() or 1
+        if cpu_count > 1 and hasattr(process, 'cpu_affinity'):
+            process.cpu_affinity(list(range(cpu_count - 1)))
+    except (psutil.Error, OSError, ValueError) as e:
+        logger.debug(f"Could not lower FFmpeg priority: {e}")
+
+class _ProgressFlusher:
+    
+    # Publishes the latest progress snapshot to ProgressCache from its own
+    # thread, so a slow cache write never stalls reading FFmpeg's output
+    
+    def __init__(self, encode_id: str, interval: float = PROGRESS_FLUSH_INTERVAL):
+        self._encode_id = encode_id
+        self._interval = interval
+        self._pending = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def update(self, cache_data: Dict):
+        self._pending = cache_data
+    
+    def _flush(self):
+        cache_data, self._pending = self._pending, None
+        if cache_data is not None:
+            ProgressCache.set_progress(self._encode_id, cache_data)
+    
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            self._flush()
+    
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._flush()
+
+def _supported_encoder_args(ffmpeg_path: str, encoder: str, args: list) -> list:
+    
+    # Strip optional tuning flags (and their values) this encoder build rejects
+    supported = ffmpeg_utils_service.get_encoder_options(ffmpeg_path, encoder)
+    filtered = []
+    for flag, value in zip(args[::2], args[1::2]):
+        if flag in NVENC_OPTIONAL_FLAGS and flag.lstrip('-') not in supported:
+            continue
+        filtered.extend([flag, value])
+    return filtered
+
+@lru_cache(maxsize=None)
+def _gpu_argv_template(
+    ffmpeg_path: str, video_codec: str, quality_preset: str, gpu_kind: str, hw_decode: bool = True
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    
+    # GPU arguments depend on what this FFmpeg build supports, so they are
+    # built on first use rather than at import. Returns (before -i, after -i).
+    gpu_encoder = GPU_ENCODER_CONFIGS[video_codec][gpu_kind]
+    
+    # Decode on the same GPU when possible so frames stay in VRAM
+    hwaccel = HWACCEL_CONFIGS.get(gpu_kind)
+    if hw_decode and hwaccel and hwaccel['hwaccel'] in ffmpeg_utils_service.get_hwaccels(ffmpeg_path):
+        input_args = tuple(hwaccel['input_args'])
+        pixel_args = ('-vf', hwaccel['filter'])
+    else:
+        input_args = ()
+        pixel_args = ('-pix_fmt', 'yuv420p')
+    
+    encoder_args = _supported_encoder_args(
+        ffmpeg_path, gpu_encoder['encoder'],
+        gpu_encoder.get(quality_preset, gpu_encoder['high'])
+    )
+    
+    return input_args, ('-c:v', gpu_encoder['encoder'], *encoder_args, *OUTPUT_ARGS, *pixel_args)
+
+class _ProgressParser:
+    
+    # Folds FFmpeg's -progress key=value lines into throttled snapshots;
+    # shared by the sync and async encoders
+    
+    SPINNER_CHARS = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+    
+    def __init__(self, duration: Optional[float]):
+        self._duration = duration
+        self._start_time = time.monotonic_ns()
+        self._last_update = 0
+        self._spinner_idx = 0
+        self._state = {}
+    
+    def feed(self, line: bytes) -> Optional[Tuple[Dict, Dict]]:
+        
+        # Returns (progress_data, cache_data) when a block completes and is
+        # due for publishing; each block is terminated by progress=continue|end
+        key, _, value = line.strip().partition(b'=')
+        if key != b'progress':
+            self._state[key] = value
+            return None
+        
+        now = time.monotonic_ns()
+        if value != b'end' and now - self._last_update < PROGRESS_INTERVAL_NS:  # Throttle updates
+            return None
+        self._last_update = now
+        
+        out_time_us = self._state.get(b'out_time_us', b'')
+        if not out_time_us.isdigit():
+            return None
+        current_time = int(out_time_us) / 1_000_000
+        
+        # Build progress data
+        progress_data = {}
+        duration = self._duration
+        
+        if duration:
+            # Progress with duration
+            progress_pct = (current_time / duration) * 100
+            elapsed = (now - self._start_time) / 1_000_000_000
+            
+            if current_time > 0:
+                eta_seconds = ((elapsed / current_time) * duration) - elapsed
+                progress_data['eta'] = f"{int(eta_seconds//60):02d}:{int(eta_seconds%60):02d}"
+            else:
+                progress_data['eta'] = "calculating..."
+            
+            progress_data['percent'] = min(progress_pct, 99)
+        else:
+            # Progress without duration
+            progress_data['current_time'] = current_time
+            progress_data['spinner'] = self.SPINNER_CHARS[self._spinner_idx % len(self.SPINNER_CHARS)]
+            self._spinner_idx += 1
+        
+        # Extract FPS and speed ('N/A' until FFmpeg has a value)
+        fps = self._state.get(b'fps', b'')
+        speed = self._state.get(b'speed', b'').strip()
+        frame = self._state.get(b'frame', b'')
+        
+        if fps.replace(b'.', b'', 1).isdigit():
+            progress_data['fps'] = float(fps)
+        if speed.endswith(b'x'):
+            progress_data['speed'] = speed.decode('ascii')
+        if frame.isdigit():
+            progress_data['frame'] = int(frame)
+        
+        # Store in cache for status API
+        cache_data = {
+            'current_phase': 'encoding'
+        }
+        if 'percent' in progress_data:
+            cache_data['encoding_progress'] = progress_data['percent']
+            cache_data['eta'] = progress_data.get('eta', '??:??')
+        if 'speed' in progress_data:
+            cache_data['speed'] = progress_data['speed']
+        if 'fps' in progress_data:
+            cache_data['fps'] = progress_data['fps']
+        
+        return progress_data, cache_data
+
 class EncodingService:
     
     @staticmethod
@@ -92,26 +473,13 @@ class EncodingService:
         
         try:
             # Use ffprobe to check if file is a valid video
-            ffprobe_path = str(Path(ffmpeg_path).parent / ('ffprobe.exe' if os.name == 'nt' else 'ffprobe'))
-            if not os.path.exists(ffprobe_path):
-                ffprobe_path = 'ffprobe'
+            data = probe_file(file_path)
             
-            cmd = [
-                ffprobe_path,
-                '-v', 'error',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=codec_type',
-                '-of', 'json',
-                file_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
+            if data is None:
                 return False, "Invalid video file or unsupported format"
             
-            data = json.loads(result.stdout)
-            if not data.get('streams'):
+            streams = data.get('streams', [])
+            if not any(stream.get('codec_type') == 'video' for stream in streams):
                 return False, "No video stream found in file"
             
             return True, None
@@ -131,26 +499,11 @@ class EncodingService:
             return None
         
         try:
-            ffprobe_path = str(Path(ffmpeg_path).parent / ('ffprobe.exe' if os.name == 'nt' else 'ffprobe'))
-            if not os.path.exists(ffprobe_path):
-                ffprobe_path = 'ffprobe'
+            data = probe_file(file_path)
             
-            cmd = [
-                ffprobe_path,
-                '-v', 'error',
-                '-show_entries', 'format=duration,size:stream=codec_name,codec_type,width,height,bit_rate',
-                '-of', 'json',
-                file_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-            
-            if result.returncode != 0:
-                logger.error(f"ffprobe error: {result.stderr}")
+            if data is None:
                 return None
             
-            data = json.loads(result.stdout)
-            
             # Extract relevant information
             metadata = {
                 'duration': float(data.get('format', {}).get('duration', 0)),
@@ -174,6 +527,120 @@ class EncodingService:
             logger.error(f"Get metadata error: {str(e)}")
             return None
     
+    @staticmethod
+    def _can_stream_copy(input_path: str, video_codec: str) -> bool:
+        
+        # True when re-encoding would only reproduce what the input already
+        # is: requested video codec in yuv420p, AAC (or no) audio, MP4 container
+        try:
+            data = probe_file(input_path)
+        except OSError:
+            return False
+        if not data or 'mp4' not in data.get('format', {}).get('format_name', '').split(','):
+            return False
+        
+        streams = data.get('streams', [])
+        video = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+        audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), None)
+        
+        return (
+            video is not None
+            and video.get('codec_name') == PROBE_CODEC_NAMES.get(video_codec)
+            and video.get('pix_fmt') == 'yuv420p'
+            and (audio is None or audio.get('codec_name') == AUDIO_CONFIG['codec'])
+        )
+    
+    @staticmethod
+    def _build_encode_command(
+        ffmpeg_path: str,
+        input_path: str,
+        output_path: str,
+        video_codec: str,
+        quality_preset: str,
+        use_gpu: bool,
+        extra_outputs: Optional[List[Dict]],
+        progress: bool = True,
+        copy_if_compatible: bool = False,
+        gpu_decode: bool = True,
+        threads: Optional[int] = None
+    ) -> Tuple[Optional[list], Optional[str], Optional[str]]:
+        
+        # Returns (cmd, gpu_kind, error); gpu_kind is None for CPU encodes
+        progress_args = ('-progress', 'pipe:1', '-nostats') if progress else ('-nostats',)
+        
+        # Nothing to encode: remux with stream copy. Only on request, since a
+        # quality preset asks for a re-encode even when the codecs match
+        if (copy_if_compatible and not extra_outputs
+                and EncodingService._can_stream_copy(input_path, video_codec)):
+            logger.info(f"Input already {video_codec}/{AUDIO_CONFIG['codec']} MP4, copying streams")
+            cmd = [
+                ffmpeg_path,
+                '-i', input_path,
+                *progress_args,
+                *STREAM_COPY_ARGS,
+                '-y',
+                output_path
+            ]
+            return cmd, None, None
+        
+        # Try GPU encoding first if requested
+        gpu_kind = None
+        gpu_type = None
+        if use_gpu:
+            gpu_encoder_name, gpu_type = ffmpeg_utils_service.detect_gpu_encoder(ffmpeg_path, video_codec)
+            gpu_kind = _GPU_ENCODER_KINDS.get(gpu_encoder_name)
+        
+        # Build encoding command
+        if gpu_kind:
+            # GPU encoding
+            # Extra outputs need frames in system memory, so they keep CPU decode
+            input_args, output_args = _gpu_argv_template(
+                ffmpeg_path, video_codec, quality_preset, gpu_kind, hw_decode=gpu_decode and not extra_outputs
+            )
+            logger.info(f"Using GPU encoder: {gpu_type} ({GPU_ENCODER_CONFIGS[video_codec][gpu_kind]['encoder']})")
+        else:
+            # CPU encoding
+            if video_codec == 'av1' and not use_gpu:
+                # AV1 without GPU -> fallback to H.265
+                logger.warning("⚠️  AV1 GPU encoder not available, falling back to H.265")
+                video_codec = 'h265'
+            
+            if video_codec not in CPU_CODEC_CONFIGS:
+                return None, None, f"Unsupported codec: {video_codec}"
+            
+            encoder = CPU_CODEC_CONFIGS[video_codec]['encoder']
+            fallback_config = CPU_FALLBACK_CODEC_CONFIGS.get(video_codec)
+            if fallback_config:
+                encoders = ffmpeg_utils_service.get_encoders(ffmpeg_path)
+                if encoder not in encoders and fallback_config['encoder'] in encoders:
+                    encoder = fallback_config['encoder']
+            
+            if threads is None:
+                output_args = _ARGV_TEMPLATES.get((video_codec, quality_preset, encoder))
+            else:
+                output_args = _cpu_argv_for_threads(video_codec, quality_preset, encoder, threads)
+            if output_args is None:
+                return None, None, f"Unsupported quality preset: {quality_preset}"
+            input_args = ()
+            logger.info(f"Using CPU encoder: {encoder}")
+        
+        cmd = [
+            ffmpeg_path,
+            *input_args,
+            '-i', input_path,
+            *progress_args,
+            *output_args,
+            '-y',
+            output_path
+        ]
+        
+        # Additional outputs share the single decode and progress stream
+        for extra_output in extra_outputs or ():
+            cmd.extend([*extra_output.get('args', ()), '-y', extra_output['path']])
+        
+        logger.info(f"Starting encoding: {video_codec} ({quality_preset})")
+        return cmd, gpu_kind, None
+    
     @staticmethod
     def encode_video_to_mp4(
         input_path: str,
@@ -182,181 +649,124 @@ class EncodingService:
         quality_preset: str = 'high',
         use_gpu: bool = True,
         encode_id: Optional[str] = None,
-        progress_callback: Optional[Callable[[Dict], None]] = None
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        duration: Optional[float] = None,
+        extra_outputs: Optional[List[Dict]] = None,
+        copy_if_compatible: bool = False,
+        gpu_decode: bool = True,
+        threads: Optional[int] = None
     ) -> Tuple[bool, Optional[str]]:
         
+        # extra_outputs: further files written from the same decode, each
+        # {'path': str, 'args': [output options]} (thumbnail, HLS rendition).
+        # copy_if_compatible: remux instead of encoding when the input already
+        # is the requested codec in MP4, for callers not changing quality.
+        # gpu_decode=False keeps a GPU encode but decodes on the CPU; threads
+        # overrides Config.ENCODING_THREADS for CPU encodes
         try:
             ffmpeg_path, _ = ffmpeg_utils_service.get_ffmpeg_path()
             if not ffmpeg_path:
                 return False, "FFmpeg not available"
             
-            # Get video duration for progress tracking
-            duration = ffmpeg_utils_service.get_video_duration(ffmpeg_path, input_path)
+            # Without a cache entry or callback to feed, progress is neither
+            # requested from FFmpeg nor parsed
+            track_progress = bool(encode_id or progress_callback)
             
-            # Try GPU encoding first if requested
-            gpu_encoder = None
-            gpu_type = None
-            if use_gpu:
-                gpu_encoder_name, gpu_type = ffmpeg_utils_service.detect_gpu_encoder(ffmpeg_path, video_codec)
-                if gpu_encoder_name:
-                    # Find GPU config
-                    for encoder_type_key in GPU_ENCODER_CONFIGS.get(video_codec, {}).keys():
-                        if encoder_type_key in gpu_encoder_name:
-                            gpu_encoder = GPU_ENCODER_CONFIGS[video_codec][encoder_type_key]
-                            break
-            
-            # Build encoding command
-            if gpu_encoder:
-                # GPU encoding
-                logger.info(f"Using GPU encoder: {gpu_type} ({gpu_encoder['encoder']})")
-                cmd = [
-                    ffmpeg_path,
-                    '-i', input_path,
-                    '-progress', 'pipe:2',
-                    '-c:v', gpu_encoder['encoder']
-                ] + gpu_encoder.get(quality_preset, gpu_encoder['high']) + [
-                    '-c:a', AUDIO_CONFIG['codec'],
-                    '-b:a', AUDIO_CONFIG['bitrate'],
-                    '-ar', AUDIO_CONFIG['sample_rate'],
-                    '-movflags', '+faststart',
-                    '-pix_fmt', 'yuv420p',
-                    '-y',
-                    output_path
-                ]
-            else:
-                # CPU encoding
-                if video_codec == 'av1' and not use_gpu:
-                    # AV1 without GPU -> fallback to H.265
-                    logger.warning("⚠️  AV1 GPU encoder not available, falling back to H.265")
-                    video_codec = 'h265'
-                
-                logger.info(f"Using CPU encoder: {CPU_CODEC_CONFIGS[video_codec]['encoder']}")
-                codec_config = CPU_CODEC_CONFIGS[video_codec]
-                preset_config = codec_config['quality_presets'][quality_preset]
-                
-                cmd = [
-                    ffmpeg_path,
-                    '-i', input_path,
-                    '-progress', 'pipe:2',
-                    '-c:v', codec_config['encoder']
-                ]
-                
-                # Add codec-specific parameters
-                if video_codec == 'av1':
-                    cmd.extend(['-crf', preset_config['crf'], '-preset', preset_config['preset']])
-                else:
-                    cmd.extend(['-crf', preset_config['crf'], '-preset', preset_config['preset']])
-                
-                cmd.extend([
-                    '-c:a', AUDIO_CONFIG['codec'],
-                    '-b:a', AUDIO_CONFIG['bitrate'],
-                    '-ar', AUDIO_CONFIG['sample_rate'],
-                    '-movflags', '+faststart',
-                    '-pix_fmt', 'yuv420p',
-                    '-y',
-                    output_path
-                ])
+            # Get video duration for progress tracking; callers that already
+            # know it (stored upload metadata, clip length) skip the probe
+            if not duration and track_progress:
+                duration = ffmpeg_utils_service.get_video_duration(ffmpeg_path, input_path)
+            
+            cmd, gpu_kind, error = EncodingService._build_encode_command(
+                ffmpeg_path, input_path, output_path, video_codec, quality_preset, use_gpu, extra_outputs,
+                progress=track_progress, copy_if_compatible=copy_if_compatible, gpu_decode=gpu_decode,
+                threads=threads
+            )
+            if error:
+                return False, error
             
             # Update status to processing
             if encode_id:
                 Video.update_status(encode_id, VideoStatus.PROCESSING)
             
-            logger.info(f"Starting encoding: {video_codec} ({quality_preset})")
-            
-            # Execute FFmpeg with progress monitoring
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1
-            )
-            
-            start_time = time.time()
-            last_update = 0
-            spinner_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-            spinner_idx = 0
-            
-            # Parse progress from stderr
-            for line in process.stderr:
-                # Look for time progress
-                time_match = re.search(r'time=(\d+):(\d+):(\d+\.\d+)', line)
+            if not track_progress:
+                # Nothing consumes progress: a single communicate() call
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE
+                )
+                _deprioritize(process.pid)
+                _, stderr = process.communicate()
+                stderr_tail = deque(stderr.splitlines(keepends=True), maxlen=STDERR_TAIL_LINES)
+            else:
+                # Execute FFmpeg with progress monitoring
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    bufsize=0
+                )
+                _deprioritize(process.pid)
                 
-                if time_match:
-                    now = time.time()
-                    if now - last_update >= 0.5:  # Throttle updates
-                        last_update = now
-                        
-                        hours, minutes, seconds = time_match.groups()
-                        current_time = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-                        
-                        # Build progress data
-                        progress_data = {}
-                        
-                        if duration:
-                            # Progress with duration
-                            progress_pct = (current_time / duration) * 100
-                            elapsed = now - start_time
-                            
-                            if current_time > 0:
-                                eta_seconds = ((elapsed / current_time) * duration) - elapsed
-                                progress_data['eta'] = f"{int(eta_seconds//60):02d}:{int(eta_seconds%60):02d}"
-                            else:
-                                progress_data['eta'] = "calculating..."
-                            
-                            progress_data['percent'] = min(progress_pct, 99)
-                        else:
-                            # Progress without duration
-                            progress_data['current_time'] = current_time
-                            progress_data['spinner'] = spinner_chars[spinner_idx % len(spinner_chars)]
-                            spinner_idx += 1
-                        
-                        # Extract FPS and speed
-                        fps_match = re.search(r'fps=\s*([\d.]+)', line)
-                        speed_match = re.search(r'speed=\s*([\d.]+)x', line)
-                        frame_match = re.search(r'frame=\s*(\d+)', line)
-                        
-                        if fps_match:
-                            progress_data['fps'] = float(fps_match.group(1))
-                        if speed_match:
-                            progress_data['speed'] = speed_match.group(1) + 'x'
-                        if frame_match:
-                            progress_data['frame'] = int(frame_match.group(1))
-                        
-                        # Store in cache for status API
-                        from src.services.progress_cache import ProgressCache
-                        cache_data = {
-                            'current_phase': 'encoding'
-                        }
-                        if 'percent' in progress_data:
-                            cache_data['encoding_progress'] = progress_data['percent']
-                            cache_data['eta'] = progress_data.get('eta', '??:??')
-                        if 'speed' in progress_data:
-                            cache_data['speed'] = progress_data['speed']
-                        if 'fps' in progress_data:
-                            cache_data['fps'] = progress_data['fps']
+                # Keep draining stderr so FFmpeg never blocks on a full pipe;
+                # the tail is kept for error reporting
+                stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+                stderr_thread = threading.Thread(
+                    target=_drain_stream, args=(process.stderr, stderr_tail), daemon=True
+                )
+                stderr_thread.start()
+                
+                parser = _ProgressParser(duration)
+                
+                flusher = _ProgressFlusher(encode_id) if encode_id else None
+                if flusher:
+                    flusher.start()
+                
+                try:
+                    for line in _iter_lines(process.stdout):
+                        update = parser.feed(line)
+                        if update is None:
+                            continue
+                        progress_data, cache_data = update
                         
-                        if encode_id:
-                            ProgressCache.set_progress(encode_id, cache_data)
+                        if flusher:
+                            flusher.update(cache_data)
                         
                         # Call progress callback if provided
                         if progress_callback:
                             progress_callback(progress_data)
-            
-            # Wait for process to complete
-            process.wait()
+                finally:
+                    if flusher:
+                        flusher.stop()
+                
+                # Wait for process to complete
+                process.wait()
+                stderr_thread.join(timeout=5)
             
             if process.returncode != 0:
+                # NVDEC/QSV reject some input codecs, and the GPU scaler then
+                # gets no hardware frames: keep the GPU encoder with CPU decode
+                if gpu_kind and '-hwaccel' in cmd:
+                    logger.warning("⚠️  GPU decoding failed, retrying with CPU decode...")
+                    return EncodingService.encode_video_to_mp4(
+                        input_path, output_path, video_codec, quality_preset,
+                        use_gpu=use_gpu, encode_id=encode_id, progress_callback=progress_callback,
+                        duration=duration, extra_outputs=extra_outputs, copy_if_compatible=copy_if_compatible,
+                        gpu_decode=False, threads=threads
+                    )
                 # If GPU encoding failed, retry with CPU
-                if gpu_encoder and use_gpu:
+                if gpu_kind and use_gpu:
                     logger.warning(f"⚠️  GPU encoding failed, retrying with CPU...")
                     return EncodingService.encode_video_to_mp4(
                         input_path, output_path, video_codec, quality_preset,
-                        use_gpu=False, encode_id=encode_id, progress_callback=progress_callback
+                        use_gpu=False, encode_id=encode_id, progress_callback=progress_callback,
+                        duration=duration, extra_outputs=extra_outputs, copy_if_compatible=copy_if_compatible,
+                        threads=threads
                     )
                 else:
                     error_msg = f"Encoding failed (exit code {process.returncode})"
-                    logger.error(error_msg)
+                    logger.error(f"{error_msg}: {b''.join(stderr_tail).decode(errors='replace').strip()}")
                     return False, error_msg
             
             # Verify output file exists
@@ -380,6 +790,238 @@ class EncodingService:
             traceback.print_exc()
             return False, error_msg
     
+    @staticmethod
+    async def encode_video_to_mp4_async(
+        input_path: str,
+        output_path: str,
+        video_codec: str = 'h264',
+        quality_preset: str = 'high',
+        use_gpu: bool = True,
+        encode_id: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        duration: Optional[float] = None,
+        extra_outputs: Optional[List[Dict]] = None,
+        copy_if_compatible: bool = False,
+        gpu_decode: bool = True
+    ) -> Tuple[bool, Optional[str]]:
+        
+        # Event-loop variant of encode_video_to_mp4: FFmpeg is supervised by a
+        # coroutine instead of a blocked thread, and the blocking probe and
+        # cache/database writes are pushed to the default executor
+        process = None
+        stderr_task = None
+        try:
+            ffmpeg_path, _ = await asyncio.to_thread(ffmpeg_utils_service.get_ffmpeg_path)
+            if not ffmpeg_path:
+                return False, "FFmpeg not available"
+            
+            if not duration:
+                duration = await asyncio.to_thread(ffmpeg_utils_service.get_video_duration, ffmpeg_path, input_path)
+            
+            cmd, gpu_kind, error = await asyncio.to_thread(
+                EncodingService._build_encode_command,
+                ffmpeg_path, input_path, output_path, video_codec, quality_preset, use_gpu, extra_outputs,
+                True, copy_if_compatible, gpu_decode
+            )
+            if error:
+                return False, error
+            
+            if encode_id:
+                await asyncio.to_thread(Video.update_status, encode_id, VideoStatus.PROCESSING)
+            
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _deprioritize(process.pid)
+            
+            stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+            
+            async def drain_stderr():
+                async for line in process.stderr:
+                    stderr_tail.append(line)
+            
+            stderr_task = asyncio.create_task(drain_stderr())
+            parser = _ProgressParser(duration)
+            
+            async for line in process.stdout:
+                update = parser.feed(line)
+                if update is None:
+                    continue
+                progress_data, cache_data = update
+                
+                if encode_id:
+                    await asyncio.to_thread(ProgressCache.set_progress, encode_id, cache_data)
+                
+                if progress_callback:
+                    progress_callback(progress_data)
+            
+            await process.wait()
+            await stderr_task
+            
+            if process.returncode != 0:
+                # NVDEC/QSV reject some input codecs, and the GPU scaler then
+                # gets no hardware frames: keep the GPU encoder with CPU decode
+                if gpu_kind and '-hwaccel' in cmd:
+                    logger.warning("⚠️  GPU decoding failed, retrying with CPU decode...")
+                    return await EncodingService.encode_video_to_mp4_async(
+                        input_path, output_path, video_codec, quality_preset,
+                        use_gpu=use_gpu, encode_id=encode_id, progress_callback=progress_callback,
+                        duration=duration, extra_outputs=extra_outputs, copy_if_compatible=copy_if_compatible,
+                        gpu_decode=False
+                    )
+                # If GPU encoding failed, retry with CPU
+                if gpu_kind and use_gpu:
+                    logger.warning("⚠️  GPU encoding failed, retrying with CPU...")
+                    return await EncodingService.encode_video_to_mp4_async(
+                        input_path, output_path, video_codec, quality_preset,
+                        use_gpu=False, encode_id=encode_id, progress_callback=progress_callback,
+                        duration=duration, extra_outputs=extra_outputs, copy_if_compatible=copy_if_compatible
+                    )
+                error_msg = f"Encoding failed (exit code {process.returncode})"
+                logger.error(f"{error_msg}: {b''.join(stderr_tail).decode(errors='replace').strip()}")
+                return False, error_msg
+            
+            if not os.path.exists(output_path):
+                return False, "Output file not created"
+            
+            logger.info(f"Encoding completed successfully: {output_path}")
+            return True, None
+            
+        except asyncio.CancelledError:
+            if process and process.returncode is None:
+                process.kill()
+            if stderr_task:
+                stderr_task.cancel()
+            raise
+            
+        except Exception as e:
+            error_msg = f"Encoding error: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+    
+    @staticmethod
+    def encode_video_to_mp4_parallel(
+        input_path: str,
+        output_path: str,
+        video_codec: str = 'h264',
+        quality_preset: str = 'high',
+        use_gpu: bool = False,
+        encode_id: Optional[str] = None,
+        duration: Optional[float] = None,
+        segments: int = PARALLEL_ENCODE_SEGMENTS
+    ) -> Tuple[bool, Optional[str]]:
+        
+        # Split a long input at keyframes, encode the chunks concurrently and
+        # stitch them back with the concat demuxer. Short inputs gain nothing
+        # from the extra passes and go through encode_video_to_mp4 directly.
+        ffmpeg_path, _ = ffmpeg_utils_service.get_ffmpeg_path()
+        if not ffmpeg_path:
+            return False, "FFmpeg not available"
+        
+        if not duration:
+            duration = ffmpeg_utils_service.get_video_duration(ffmpeg_path, input_path)
+        
+        if not duration or duration <= PARALLEL_ENCODE_MIN_DURATION or segments < 2:
+            return EncodingService.encode_video_to_mp4(
+                input_path, output_path, video_codec, quality_preset,
+                use_gpu=use_gpu, encode_id=encode_id, duration=duration
+            )
+        
+        work_dir = tempfile.mkdtemp(prefix='encode_chunks_', dir=os.path.dirname(os.path.abspath(output_path)))
+        
+        try:
+            if encode_id:
+                Video.update_status(encode_id, VideoStatus.PROCESSING)
+            
+            # 1. Keyframe-aligned, video-only chunks (stream copy, no decode);
+            # audio is encoded once from the source when concatenating
+            split_cmd = [
+                ffmpeg_path,
+                '-i', input_path,
+                '-map', '0:v:0',
+                '-c', 'copy',
+                '-f', 'segment',
+                '-segment_time', f'{duration / segments:.3f}',
+                '-reset_timestamps', '1',
+                os.path.join(work_dir, 'chunk_%03d.mkv')
+            ]
+            result = subprocess.run(split_cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"Chunk split failed: {result.stderr[-2000:]}")
+                return False, f"Chunk split failed (exit code {result.returncode})"
+            
+            chunks = sorted(
+                os.path.join(work_dir, name) for name in os.listdir(work_dir) if name.startswith('chunk_')
+            )
+            encoded_chunks = [f"{os.path.splitext(chunk)[0]}.mp4" for chunk in chunks]
+            logger.info(f"Encoding {len(chunks)} chunks in parallel: {video_codec} ({quality_preset})")
+            
+            # 2. Encode chunks concurrently; each worker thread only supervises
+            # its own FFmpeg process, so the encodes run on separate cores.
+            # The chunks split the thread budget instead of each taking all of it
+            threads = max(1, (Config.ENCODING_THREADS or os.cpu_count() or 1) // len(chunks))
+            completed = 0
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                futures = [
+                    executor.submit(
+                        EncodingService.encode_video_to_mp4,
+                        chunk, encoded_chunk, video_codec, quality_preset, use_gpu=use_gpu, threads=threads
+                    )
+                    for chunk, encoded_chunk in zip(chunks, encoded_chunks)
+                ]
+                for future in as_completed(futures):
+                    success, error = future.result()
+                    if not success:
+                        return False, error
+                    completed += 1
+                    if encode_id:
+                        ProgressCache.set_progress(encode_id, {
+                            'current_phase': 'encoding',
+                            'encoding_progress': min(completed / len(chunks) * 100, 99)
+                        })
+            
+            # 3. Concatenate without re-encoding video and add the source audio
+            concat_list = os.path.join(work_dir, 'chunks.txt')
+            with open(concat_list, 'w') as f:
+                for encoded_chunk in encoded_chunks:
+                    # Concat list quoting: a ' inside a quoted path is written '\''
+                    escaped = encoded_chunk.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            concat_cmd = [
+                ffmpeg_path,
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_list,
+                '-i', input_path,
+                '-map', '0:v:0',
+                '-map', '1:a:0?',
+                '-c:v', 'copy',
+                *OUTPUT_ARGS,
+                '-y',
+                output_path
+            ]
+            result = subprocess.run(concat_cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"Chunk concat failed: {result.stderr[-2000:]}")
+                return False, f"Chunk concat failed (exit code {result.returncode})"
+            
+            if not os.path.exists(output_path):
+                return False, "Output file not created"
+            
+            logger.info(f"Parallel encoding completed successfully: {output_path}")
+            return True, None
+            
+        except Exception as e:
+            error_msg = f"Encoding error: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+            
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
     @staticmethod
     def get_supported_codecs() -> Dict[str, list]:
         
@@ -5,8 +5,10 @@ import re
 import time
 import subprocess
 import logging
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +30,46 @@ def timestamp_to_seconds(timestamp) -> int:
     else:
         raise ValueError(f"Invalid timestamp format: {timestamp}")
 
+def parse_progress_time(line: str) -> Optional[float]:
+    
+    # Seconds from the 'time=HH:MM:SS.ss' field of an FFmpeg stats line,
+    # sliced out with str.find rather than matched with a regex
+    start = line.find('time=')
+    if start < 0:
+        return None
+    start += 5
+    end = line.find(' ', start)
+    clock = line[start:end] if end >= 0 else line[start:]
+    
+    try:
+        hours, minutes, seconds = clock.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:  # 'N/A' before the first frame
+        return None
+
+# (ffmpeg_path, ffmpeg_dir) once found; a miss is not cached so a later
+# setup_ffmpeg() is still picked up
+_ffmpeg_location: Optional[Tuple[str, str]] = None
+
+def parse_stats_line(line: str) -> Dict[str, str]:
+    
+    # 'frame=  100 fps= 25 size=    1024KiB ... speed=2.1x' -> {'frame': '100', ...};
+    # FFmpeg pads values after '=', so collapse that before splitting
+    fields = ' '.join(line.split()).replace('= ', '=').split(' ')
+    return dict(field.split('=', 1) for field in fields if '=' in field)
+
 def get_ffmpeg_path() -> Tuple[Optional[str], Optional[str]]:
     
+    global _ffmpeg_location
+    if _ffmpeg_location is None:
+        ffmpeg_path, ffmpeg_dir = _find_ffmpeg()
+        if not ffmpeg_path:
+            return None, None
+        _ffmpeg_location = (ffmpeg_path, ffmpeg_dir)
+    return _ffmpeg_location
+
+def _find_ffmpeg() -> Tuple[Optional[str], Optional[str]]:
+    
     # Check project bin directory first
     project_root = Path(__file__).parent.parent.parent
     bin_dir = project_root / 'bin'
@@ -108,14 +148,72 @@ def setup_ffmpeg() -> Tuple[Optional[str], Optional[str]]:
     logger.error("❌ FFmpeg not available")
     return None, None
 
+@lru_cache(maxsize=None)
+def get_ffprobe_path(ffmpeg_path: str) -> Optional[str]:
+    
+    # ffprobe is usually in the same directory as ffmpeg
+    ffprobe_path = str(Path(ffmpeg_path).parent / ('ffprobe.exe' if os.name == 'nt' else 'ffprobe'))
+    if os.path.exists(ffprobe_path):
+        return ffprobe_path
+    return None
+
+@lru_cache(maxsize=None)
+def get_hwaccels(ffmpeg_path: str) -> frozenset:
+    
+    # Hardware decode methods compiled into this FFmpeg (`ffmpeg -hwaccels`)
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, '-hide_banner', '-hwaccels'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        lines = result.stdout.splitlines()[1:]  # skip "Hardware acceleration methods:"
+        return frozenset(line.strip() for line in lines if line.strip())
+    except Exception as e:
+        logger.warning(f"⚠️  Could not query FFmpeg hwaccels: {e}")
+        return frozenset()
+
+@lru_cache(maxsize=None)
+def get_encoders(ffmpeg_path: str) -> frozenset:
+    
+    # Encoder names compiled into this FFmpeg (`ffmpeg -encoders`)
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, '-hide_banner', '-encoders'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        return frozenset(re.findall(r'^\s[VAS][A-Z.]{5}\s+([\w-]+)', result.stdout, re.MULTILINE))
+    except Exception as e:
+        logger.warning(f"⚠️  Could not query FFmpeg encoders: {e}")
+        return frozenset()
+
+@lru_cache(maxsize=None)
+def get_encoder_options(ffmpeg_path: str, encoder: str) -> frozenset:
+    
+    # Private option names (without the leading dash) reported by
+    # `ffmpeg -h encoder=<name>`; probed once per encoder per process
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, '-hide_banner', '-h', f'encoder={encoder}'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        return frozenset(re.findall(r'^\s+-(\S+)', result.stdout, re.MULTILINE))
+    except Exception as e:
+        logger.warning(f"⚠️  Could not query options for encoder {encoder}: {e}")
+        return frozenset()
+
 def get_video_duration(ffmpeg_path: str, video_path: str) -> Optional[float]:
     
     try:
-        # ffprobe is usually in the same directory as ffmpeg
-        ffprobe_path = str(Path(ffmpeg_path).parent / ('ffprobe.exe' if os.name == 'nt' else 'ffprobe'))
+        ffprobe_path = get_ffprobe_path(ffmpeg_path)
         
         # Try ffprobe first (fastest method)
-        if os.path.exists(ffprobe_path):
+        if ffprobe_path:
             cmd = [
                 ffprobe_path,
                 '-v', 'error',
@@ -151,29 +249,52 @@ def get_video_duration(ffmpeg_path: str, video_path: str) -> Optional[float]:
         logger.warning(f"⚠️  Could not determine video duration: {e}")
         return None
 
+# GPU encoders probed per codec, in order: AMD → NVIDIA → Intel
+GPU_ENCODER_CANDIDATES = {
+    'h264': [
+        ('h264_amf', 'AMD'),
+        ('h264_nvenc', 'NVIDIA'),
+        ('h264_qsv', 'Intel QuickSync'),
+    ],
+    'h265': [
+        ('hevc_amf', 'AMD'),
+        ('hevc_nvenc', 'NVIDIA'),
+        ('hevc_qsv', 'Intel QuickSync'),
+    ],
+    'av1': [
+        ('av1_amf', 'AMD RDNA 3+'),
+        ('av1_nvenc', 'NVIDIA RTX 40-series'),
+        ('av1_qsv', 'Intel Arc'),
+    ],
+}
+
+# (ffmpeg_path, codec) -> (result, probed_at). A working encoder is kept for
+# the life of the process; a miss is probed again after this many seconds,
+# so one trial encode that timed out or met a busy GPU (e.g. during the
+# warm-up at boot) does not pin every later encode to the CPU
+GPU_MISS_RETRY_SECONDS = 300
+_gpu_encoders: Dict[Tuple[str, str], Tuple[Tuple[Optional[str], Optional[str]], float]] = {}
+# Serializes the trial encodes, which would otherwise compete for the GPU
+_gpu_probe_lock = threading.Lock()
+
 def detect_gpu_encoder(ffmpeg_path: str, codec: str = 'h264') -> Tuple[Optional[str], Optional[str]]:
     
-    encoders_to_test = []
-    
-    if codec == 'h264':
-        # Test in order: AMD → NVIDIA → Intel
-        encoders_to_test = [
-            ('h264_amf', 'AMD'),
-            ('h264_nvenc', 'NVIDIA'),
-            ('h264_qsv', 'Intel QuickSync'),
-        ]
-    elif codec == 'h265':
-        encoders_to_test = [
-            ('hevc_amf', 'AMD'),
-            ('hevc_nvenc', 'NVIDIA'),
-            ('hevc_qsv', 'Intel QuickSync'),
-        ]
-    elif codec == 'av1':
-        encoders_to_test = [
-            ('av1_amf', 'AMD RDNA 3+'),
-            ('av1_nvenc', 'NVIDIA RTX 40-series'),
-            ('av1_qsv', 'Intel Arc'),
-        ]
+    key = (ffmpeg_path, codec)
+    cached = _gpu_encoders.get(key)
+    if cached and (cached[0][0] or time.monotonic() - cached[1] < GPU_MISS_RETRY_SECONDS):
+        return cached[0]
+    
+    with _gpu_probe_lock:
+        cached = _gpu_encoders.get(key)
+        if cached and (cached[0][0] or time.monotonic() - cached[1] < GPU_MISS_RETRY_SECONDS):
+            return cached[0]
+        result = _probe_gpu_encoder(ffmpeg_path, codec)
+        _gpu_encoders[key] = (result, time.monotonic())
+        return result
+
+def _probe_gpu_encoder(ffmpeg_path: str, codec: str) -> Tuple[Optional[str], Optional[str]]:
+    
+    encoders_to_test = GPU_ENCODER_CANDIDATES.get(codec, [])
     
     # Test each encoder by trying to encode a dummy frame
     for encoder, gpu_type in encoders_to_test:
@@ -207,3 +328,21 @@ def detect_gpu_encoder(ffmpeg_path: str, codec: str = 'h264') -> Tuple[Optional[
     
     logger.info("ℹ️  No GPU encoder detected, will use CPU")
     return None, None
+
+def warm_ffmpeg_capabilities() -> threading.Thread:
+    
+    # Run the cached capability probes (encoders, hwaccels, GPU trial
+    # encodes) in the background at startup so no request pays for them
+    def probe():
+        ffmpeg_path, _ = get_ffmpeg_path()
+        if not ffmpeg_path:
+            return
+        get_ffprobe_path(ffmpeg_path)
+        get_encoders(ffmpeg_path)
+        get_hwaccels(ffmpeg_path)
+        for codec in GPU_ENCODER_CANDIDATES:
+            detect_gpu_encoder(ffmpeg_path, codec)
+    
+    thread = threading.Thread(target=probe, name='ffmpeg-capabilities', daemon=True)
+    thread.start()
+    return thread
@@ -1,13 +1,22 @@
 
 import logging
+import threading
+import time
+from collections import OrderedDict
 import firebase_admin
 from firebase_admin import auth
 
 logger = logging.getLogger(__name__)
 
+# Verified tokens are reused for at most this long (and never past `exp`)
+TOKEN_CACHE_TTL_SECONDS = 300
+TOKEN_CACHE_MAX_SIZE = 10000
+
 class FirebaseService:
     
     _instance = None
+    _token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _token_cache_lock = threading.RLock()
     
     def __new__(cls):
         
@@ -15,10 +24,38 @@ class FirebaseService:
             cls._instance = super(FirebaseService, cls).__new__(cls)
         return cls._instance
     
+    def _get_cached_token(self, id_token: str):
+        
+        with self._token_cache_lock:
+            entry = self._token_cache.get(id_token)
+            if entry is None:
+                return None
+            cached_until, decoded_token = entry
+            if cached_until <= time.time():
+                del self._token_cache[id_token]
+                return None
+            return decoded_token
+    
+    def _cache_token(self, id_token: str, decoded_token: dict):
+        
+        cached_until = min(
+            time.time() + TOKEN_CACHE_TTL_SECONDS,
+            decoded_token.get('exp', 0)
+        )
+        with self._token_cache_lock:
+            self._token_cache[id_token] = (cached_until, decoded_token)
+            if len(self._token_cache) > TOKEN_CACHE_MAX_SIZE:
+                self._token_cache.popitem(last=False)
+    
     def verify_id_token(self, id_token: str):
         
+        decoded_token = self._get_cached_token(id_token)
+        if decoded_token is not None:
+            return decoded_token
+        
         try:
             decoded_token = auth.verify_id_token(id_token)
+            self._cache_token(id_token, decoded_token)
             return decoded_token
         except Exception as e:
             logger.error(f"Failed to verify Firebase ID token: {str(e)}")
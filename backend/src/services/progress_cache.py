@@ -1,38 +1,166 @@
 
+import json
+import time
+import atexit
 import logging
+import threading
 from typing import Optional, Dict
 
+# orjson when installed; Redis accepts its bytes output as-is
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on sockets opened to Redis by this process
+REDIS_MAX_CONNECTIONS = 50
+
 # Try to import Redis, fall back to local dict
 try:
     import redis
-    from src.config import Config
-    
-    # Try to connect to Redis
-    try:
-        redis_uri = getattr(Config, 'REDIS_URI', 'redis://localhost:6379/0')
-        redis_client = redis.from_url(
-            redis_uri,
-            decode_responses=True,
-            socket_connect_timeout=2
-        )
-        # Test connection
-        redis_client.ping()
-        REDIS_AVAILABLE = True
-        logger.info("Redis connection established for progress cache")
-    except Exception as e:
-        logger.warning(f"Redis not available, using local dict fallback: {e}")
-        REDIS_AVAILABLE = False
-        redis_client = None
 except ImportError:
     logger.warning("redis package not installed, using local dict fallback")
-    REDIS_AVAILABLE = False
-    redis_client = None
+    redis = None
+
+from src.config import Config
+
+redis_uri = getattr(Config, 'REDIS_URI', 'redis://localhost:6379/0')
+
+# Progress is stored as one JSON string per video under its own key. The
+# worker writes the older hash format to video:progress:<id>, so the two
+# formats never share a key; reads fall back to the hash.
+_JSON_KEY_PREFIX = "video:progress:json:"
+_HASH_KEY_PREFIX = "video:progress:"
+
+# Sets a single field
+# server-side so update_field stays one round trip: KEYS[1] = key,
+# ARGV = field, JSON-encoded value, TTL seconds
+_UPDATE_FIELD_LUA = """
+local raw = redis.call('GET', KEYS[1])
+local data = raw and cjson.decode(raw) or {}
+data[ARGV[1]] = cjson.decode(ARGV[2])
+redis.call('SET', KEYS[1], cjson.encode(data), 'EX', ARGV[3])
+"""
+
+# Connected on first use rather than at import, so importing this module
+# (and booting a worker) never waits on the ping timeout
+pool = None
+redis_client = None
+_update_field_script = None
+_redis_checked = False
+_redis_lock = threading.Lock()
+
+def _get_redis():
+    
+    global pool, redis_client, _update_field_script, _redis_checked
+    if _redis_checked:
+        return redis_client
+    
+    with _redis_lock:
+        if _redis_checked:
+            return redis_client
+        
+        if redis is not None:
+            try:
+                # Shared, bounded pool: worker threads each check out their
+                # own socket instead of queuing on one; callers wait when
+                # all are in use
+                pool = redis.BlockingConnectionPool.from_url(
+                    redis_uri,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    socket_connect_timeout=2,
+                    decode_responses=True
+                )
+                client = redis.Redis(connection_pool=pool)
+                # Test connection
+                client.ping()
+                _update_field_script = client.register_script(_UPDATE_FIELD_LUA)
+                redis_client = client
+                logger.info("Redis connection established for progress cache")
+                
+                threading.Thread(target=_flush_loop, name='progress-flusher', daemon=True).start()
+                atexit.register(_flush_pending)
+            except Exception as e:
+                logger.warning(f"Redis not available, using local dict fallback: {e}")
+                pool = None
+        
+        _redis_checked = True
+        return redis_client
+
+def get_pool():
+    
+    # Connection pool of the progress cache, or None when Redis is unusable
+    _get_redis()
+    return pool
 
 # Local fallback dict
 _local_progress_cache = {}
 
+# Seconds between batched progress writes to Redis
+FLUSH_INTERVAL_SECONDS = 0.25
+
+# Latest snapshot per video awaiting the next flush, and the batch being
+# written right now; readers check both before Redis. Values: (data, ttl)
+_pending: Dict[str, tuple] = {}
+_in_flight: Dict[str, tuple] = {}
+_pending_lock = threading.Lock()
+# Held for a whole flush; delete_progress takes it so a batch already being
+# written cannot re-create a key after it is deleted
+_flush_lock = threading.Lock()
+
+def _flush_pending():
+    
+    global _in_flight
+    with _flush_lock:
+        with _pending_lock:
+            if not _pending:
+                return
+            batch = dict(_pending)
+            _pending.clear()
+            _in_flight = batch
+        
+        try:
+            # Only the newest snapshot per video is written, all in one round trip
+            pipe = redis_client.pipeline(transaction=False)
+            for video_id, (progress_data, ttl) in batch.items():
+                pipe.set(_JSON_KEY_PREFIX + video_id, _json_dumps(progress_data), ex=ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to flush progress for {len(batch)} video(s): {e}")
+            # Requeue for the next flush unless a newer snapshot arrived
+            # meanwhile; readers keep seeing it through _pending
+            with _pending_lock:
+                for video_id, entry in batch.items():
+                    _pending.setdefault(video_id, entry)
+        finally:
+            with _pending_lock:
+                _in_flight = {}
+
+def _progress_from_hash(fields: Dict[str, str]) -> Dict:
+    
+    # Hash values are all strings; convert numbers back
+    result = {}
+    for k, v in fields.items():
+        try:
+            if '.' in v:
+                result[k] = float(v)
+            else:
+                result[k] = int(v)
+        except (ValueError, AttributeError):
+            result[k] = v
+    return result
+
+def _flush_loop():
+    
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        _flush_pending()
+
 class ProgressCache:
     
     @staticmethod
@@ -46,11 +174,11 @@ class ProgressCache:
             ttl: Time to live in seconds (default: 1 hour)
         """
         try:
-            if REDIS_AVAILABLE and redis_client:
-                # Store in Redis with custom TTL
-                key = f"video:progress:{video_id}"
-                redis_client.hset(key, mapping=progress_data)
-                redis_client.expire(key, ttl)
+            client = _get_redis()
+            if client:
+                # Buffered; the flusher writes it to Redis with custom TTL
+                with _pending_lock:
+                    _pending[video_id] = (dict(progress_data), ttl)
                 return True
             else:
                 # Store in local dict
@@ -69,25 +197,23 @@ class ProgressCache:
     def get_progress(video_id: str) -> Optional[Dict]:
         
         try:
-            if REDIS_AVAILABLE and redis_client:
-                # Get from Redis
-                key = f"video:progress:{video_id}"
-                data = redis_client.hgetall(key)
+            client = _get_redis()
+            if client:
+                # Not yet written snapshots are the freshest
+                with _pending_lock:
+                    buffered = _pending.get(video_id) or _in_flight.get(video_id)
+                if buffered:
+                    return dict(buffered[0])
                 
-                if data:
-                    # Convert string values back to appropriate types
-                    result = {}
-                    for k, v in data.items():
-                        # Try to convert to number if possible
-                        try:
-                            if '.' in v:
-                                result[k] = float(v)
-                            else:
-                                result[k] = int(v)
-                        except (ValueError, AttributeError):
-                            result[k] = v
-                    return result
-                return None
+                # Get from Redis, with the worker's hash in the same round trip.
+                # JSON values keep their types; no per-field coercion needed
+                pipe = client.pipeline(transaction=False)
+                pipe.get(_JSON_KEY_PREFIX + video_id)
+                pipe.hgetall(_HASH_KEY_PREFIX + video_id)
+                raw, fields = pipe.execute()
+                if raw:
+                    return _json_loads(raw)
+                return _progress_from_hash(fields) if fields else None
             else:
                 # Get from local dict
                 return _local_progress_cache.get(video_id)
@@ -103,9 +229,13 @@ class ProgressCache:
     def delete_progress(video_id: str) -> bool:
         
         try:
-            if REDIS_AVAILABLE and redis_client:
-                key = f"video:progress:{video_id}"
-                redis_client.delete(key)
+            client = _get_redis()
+            if client:
+                # Waits out a flush in progress, which may hold this video
+                with _flush_lock:
+                    with _pending_lock:
+                        _pending.pop(video_id, None)
+                    client.delete(_JSON_KEY_PREFIX + video_id, _HASH_KEY_PREFIX + video_id)
             
             # Also remove from local cache if exists
             _local_progress_cache.pop(video_id, None)
@@ -118,10 +248,18 @@ class ProgressCache:
     def update_field(video_id: str, field: str, value) -> bool:
         
         try:
-            if REDIS_AVAILABLE and redis_client:
-                key = f"video:progress:{video_id}"
-                redis_client.hset(key, field, value)
-                redis_client.expire(key, 3600)  # Refresh TTL
+            client = _get_redis()
+            if client:
+                # A buffered snapshot would overwrite a direct write when it
+                # is flushed, so patch the snapshot instead
+                with _pending_lock:
+                    buffered = _pending.get(video_id) or _in_flight.get(video_id)
+                    if buffered:
+                        _pending[video_id] = ({**buffered[0], field: value}, buffered[1])
+                        return True
+                
+                key = _JSON_KEY_PREFIX + video_id
+                _update_field_script(keys=[key], args=[field, _json_dumps(value), 3600])  # Refreshes TTL
                 return True
             else:
                 # Update in local dict
@@ -5,18 +5,126 @@ Uses IP address + browser fingerprint composite key to track usage.
 import logging
 import hashlib
 import json
-from typing import Optional, Tuple
+import time
+import atexit
+import threading
+from typing import Optional, Tuple, Dict
 from datetime import datetime, timedelta
 from src.services.cache_service import get_cache
 from src.config import Config
 
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data):
+        return json.dumps(data, separators=(',', ':'))
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# Days are counted on the epoch second, so midnight UTC is a multiple of it
+_SECONDS_PER_DAY = 86400
+_EPOCH = datetime(1970, 1, 1)
+
+# (utc_day_number, reset_time) for the current day; rebuilt at rollover
+_reset_cache = (-1, None)
+
+# Counts read from Redis are reused for this long, and increments are
+# written back in batches; with several worker processes a client can
+# overshoot the daily limit by what other workers admit in that window
+USAGE_CACHE_TTL_SECONDS = 10
+USAGE_FLUSH_INTERVAL_SECONDS = 1.0
+USAGE_CACHE_MAX_ENTRIES = 10000
+
+# client_id -> (fetched_at, count stored in Redis)
+_usage_cache: Dict[str, Tuple[float, int]] = {}
+# client_id -> (increments, details) not yet written to Redis, and the batch
+# being written right now; both count towards usage until the write lands
+_pending_usage: Dict[str, Tuple[Dict[str, int], Dict[str, str]]] = {}
+_in_flight_usage: Dict[str, Tuple[Dict[str, int], Dict[str, str]]] = {}
+_usage_lock = threading.Lock()
+# Held for a whole flush; reset_limit takes it so a batch already being
+# written cannot land after the reset
+_flush_lock = threading.Lock()
+_flusher_started = False
+
+
+def _pending_count(client_id: str) -> int:
+    
+    total = 0
+    for buffer in (_pending_usage, _in_flight_usage):
+        pending = buffer.get(client_id)
+        if pending:
+            total += pending[0].get('count', 0)
+    return total
+
+
+def _flush_usage():
+    
+    with _flush_lock:
+        _flush_batch()
+
+
+def _flush_batch():
+    
+    global _in_flight_usage
+    with _usage_lock:
+        if not _pending_usage:
+            return
+        batch = dict(_pending_usage)
+        _pending_usage.clear()
+        _in_flight_usage = batch
+    
+    ttl = RateLimiterService._get_ttl_seconds()
+    client_ids = list(batch)
+    results = get_cache().increment_hashes([
+        (f"{RateLimiterService.KEY_PREFIX}{client_id}", increments, ttl, details)
+        for client_id, (increments, details) in batch.items()
+    ])
+    
+    with _usage_lock:
+        _in_flight_usage = {}
+        if results is None:
+            # Keep the deltas for the next attempt rather than losing usage
+            for client_id, (increments, details) in batch.items():
+                merged, _ = _pending_usage.get(client_id, ({}, None))
+                for field, amount in increments.items():
+                    merged[field] = merged.get(field, 0) + amount
+                _pending_usage[client_id] = (merged, details)
+            return
+        
+        now = time.monotonic()
+        for client_id, counts in zip(client_ids, results):
+            _usage_cache[client_id] = (now, counts[0])
+
+
+def _flush_loop():
+    
+    while True:
+        time.sleep(USAGE_FLUSH_INTERVAL_SECONDS)
+        try:
+            _flush_usage()
+        except Exception as e:
+            logger.error(f"Error flushing rate limit usage: {str(e)}")
+
+
+def _start_flusher():
+    
+    global _flusher_started
+    _flusher_started = True
+    threading.Thread(target=_flush_loop, name='rate-limit-flusher', daemon=True).start()
+    atexit.register(_flush_usage)
+
 
 class RateLimiterService:
     """Service for managing rate limits on public API endpoints."""
     
-    KEY_PREFIX = "rate_limit:public:"
+    # Usage is a Redis hash (count, <type>_count, first-seen ip and
+    # fingerprint); the prefix differs from the old JSON-string keys to
+    # avoid WRONGTYPE errors
+    KEY_PREFIX = "rate_limit:public:h:"
     
     @staticmethod
     def create_client_id(ip: str, fingerprint: dict) -> str:
@@ -28,31 +136,32 @@ class RateLimiterService:
             fingerprint: Browser fingerprint data (userAgent, screen, timezone, language, platform)
             
         Returns:
-            SHA256 hash of composite client data
+            128-bit BLAKE2b hash of composite client data
         """
         try:
             composite = f"{ip}:{fingerprint.get('userAgent', '')}:{fingerprint.get('screen', '')}:{fingerprint.get('timezone', 0)}:{fingerprint.get('language', '')}"
-            client_id = hashlib.sha256(composite.encode()).hexdigest()
+            # Bucketing key only, not a security boundary; BLAKE2b is
+            # cheaper than SHA-256 on short inputs
+            client_id = hashlib.blake2b(composite.encode(), digest_size=16).hexdigest()
             return client_id
         except Exception as e:
             logger.error(f"Error creating client ID: {str(e)}")
             # Fallback to IP only if fingerprint processing fails
-            return hashlib.sha256(ip.encode()).hexdigest()
+            return hashlib.blake2b(ip.encode(), digest_size=16).hexdigest()
     
     @staticmethod
     def _get_reset_time() -> datetime:
         """Calculate when the rate limit will reset (midnight UTC)."""
-        now = datetime.utcnow()
-        tomorrow = now + timedelta(days=1)
-        reset_time = datetime(tomorrow.year, tomorrow.month, tomorrow.day, 0, 0, 0)
-        return reset_time
+        global _reset_cache
+        day = int(time.time()) // _SECONDS_PER_DAY
+        if _reset_cache[0] != day:
+            _reset_cache = (day, _EPOCH + timedelta(days=day + 1))
+        return _reset_cache[1]
     
     @staticmethod
     def _get_ttl_seconds() -> int:
         """Get seconds until midnight UTC."""
-        now = datetime.utcnow()
-        reset_time = RateLimiterService._get_reset_time()
-        return int((reset_time - now).total_seconds())
+        return _SECONDS_PER_DAY - int(time.time()) % _SECONDS_PER_DAY
     
     @staticmethod
     def check_rate_limit(client_id: str) -> Tuple[bool, int, datetime]:
@@ -65,28 +174,13 @@ class RateLimiterService:
         Returns:
             Tuple of (allowed, remaining_count, reset_time)
         """
-        try:
-            cache = get_cache()
-            key = f"{RateLimiterService.KEY_PREFIX}{client_id}"
-            
-            data = cache.get(key)
-            
-            if not data:
-                # No data = full quota available
-                return (True, Config.PUBLIC_API_RATE_LIMIT, RateLimiterService._get_reset_time())
-            
-            count = data.get('count', 0)
-            remaining = Config.PUBLIC_API_RATE_LIMIT - count
-            
-            if remaining > 0:
-                return (True, remaining, RateLimiterService._get_reset_time())
-            else:
-                return (False, 0, RateLimiterService._get_reset_time())
-                
-        except Exception as e:
-            logger.error(f"Error checking rate limit: {str(e)}")
-            # On error, allow request (fail open)
-            return (True, Config.PUBLIC_API_RATE_LIMIT, RateLimiterService._get_reset_time())
+        # get_usage fails open (0 used) when Redis is unavailable
+        remaining = Config.PUBLIC_API_RATE_LIMIT - RateLimiterService.get_usage(client_id)
+        
+        if remaining > 0:
+            return (True, remaining, RateLimiterService._get_reset_time())
+        else:
+            return (False, 0, RateLimiterService._get_reset_time())
     
     @staticmethod
     def increment_usage(client_id: str, operation_type: str, ip: str, fingerprint: dict) -> bool:
@@ -103,35 +197,28 @@ class RateLimiterService:
             True if successful
         """
         try:
-            cache = get_cache()
-            key = f"{RateLimiterService.KEY_PREFIX}{client_id}"
+            type_field = f'{operation_type}_count'
             
-            data = cache.get(key)
+            # Buffered locally; the flusher applies all pending deltas with
+            # HINCRBY in one pipeline per interval. Client details are only
+            # written if absent (HSETNX), so they are serialized once per
+            # client per flush rather than on every call
+            with _usage_lock:
+                if not _flusher_started:
+                    _start_flusher()
+                increments, details = _pending_usage.get(client_id, ({}, None))
+                if details is None:
+                    details = {
+                        'ip': ip,
+                        'fingerprint': _json_dumps(fingerprint)
+                    }
+                increments['count'] = increments.get('count', 0) + 1
+                increments[type_field] = increments.get(type_field, 0) + 1
+                _pending_usage[client_id] = (increments, details)
+                cached = _usage_cache.get(client_id)
+                count = (cached[1] if cached else 0) + increments['count']
             
-            if not data:
-                data = {
-                    'count': 0,
-                    'operations': [],
-                    'ip': ip,
-                    'fingerprint': fingerprint
-                }
-            
-            # Increment count
-            data['count'] = data.get('count', 0) + 1
-            
-            # Add operation record
-            operations = data.get('operations', [])
-            operations.append({
-                'type': operation_type,
-                'timestamp': datetime.utcnow().isoformat()
-            })
-            data['operations'] = operations
-            
-            # Save with TTL until midnight
-            ttl = RateLimiterService._get_ttl_seconds()
-            cache.set(key, data, ttl)
-            
-            logger.info(f"Rate limit incremented for client {client_id[:8]}... ({operation_type}): {data['count']}/{Config.PUBLIC_API_RATE_LIMIT}")
+            logger.info(f"Rate limit incremented for client {client_id[:8]}... ({operation_type}): {count}/{Config.PUBLIC_API_RATE_LIMIT}")
             return True
             
         except Exception as e:
@@ -139,32 +226,58 @@ class RateLimiterService:
             return False
     
     @staticmethod
-    def get_remaining(client_id: str) -> int:
+    def get_usage(client_id: str) -> int:
         """
-        Get remaining quota for client.
+        Get number of operations used today by client.
         
         Args:
             client_id: Client identifier hash
             
         Returns:
-            Number of operations remaining
+            Operations used so far (0 if unknown)
         """
         try:
+            now = time.monotonic()
+            with _usage_lock:
+                cached = _usage_cache.get(client_id)
+                if cached and now - cached[0] < USAGE_CACHE_TTL_SECONDS:
+                    return cached[1] + _pending_count(client_id)
+            
             cache = get_cache()
             key = f"{RateLimiterService.KEY_PREFIX}{client_id}"
             
-            data = cache.get(key)
-            
-            if not data:
-                return Config.PUBLIC_API_RATE_LIMIT
+            # Only the counter field is read, never the client details
+            count = cache.get_hash_field(key, 'count')
+            count = int(count) if count else 0
             
-            count = data.get('count', 0)
-            remaining = Config.PUBLIC_API_RATE_LIMIT - count
-            return max(0, remaining)
+            with _usage_lock:
+                cached = _usage_cache.get(client_id)
+                if cached and cached[0] > now:
+                    # A flush stored this client's count after the read
+                    # started; it includes a batch the read may have missed
+                    return cached[1] + _pending_count(client_id)
+                if len(_usage_cache) >= USAGE_CACHE_MAX_ENTRIES:
+                    _usage_cache.clear()
+                _usage_cache[client_id] = (now, count)
+                return count + _pending_count(client_id)
             
         except Exception as e:
-            logger.error(f"Error getting remaining quota: {str(e)}")
-            return Config.PUBLIC_API_RATE_LIMIT
+            logger.error(f"Error getting usage: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def get_remaining(client_id: str) -> int:
+        """
+        Get remaining quota for client.
+        
+        Args:
+            client_id: Client identifier hash
+            
+        Returns:
+            Number of operations remaining
+        """
+        remaining = Config.PUBLIC_API_RATE_LIMIT - RateLimiterService.get_usage(client_id)
+        return max(0, remaining)
     
     @staticmethod
     def get_client_info(client_id: str) -> Optional[dict]:
@@ -181,8 +294,18 @@ class RateLimiterService:
             cache = get_cache()
             key = f"{RateLimiterService.KEY_PREFIX}{client_id}"
             
-            data = cache.get(key)
-            return data
+            data = cache.get_hash(key)
+            if not data:
+                return None
+            
+            # Counters come back as strings; restore their types
+            info = {
+                field: int(value) if field.endswith('count') else value
+                for field, value in data.items()
+            }
+            if 'fingerprint' in info:
+                info['fingerprint'] = _json_loads(info['fingerprint'])
+            return info
             
         except Exception as e:
             logger.error(f"Error getting client info: {str(e)}")
@@ -203,7 +326,12 @@ class RateLimiterService:
             cache = get_cache()
             key = f"{RateLimiterService.KEY_PREFIX}{client_id}"
             
-            cache.delete(key)
+            # Waits out a flush in progress, which may hold this client
+            with _flush_lock:
+                with _usage_lock:
+                    _usage_cache.pop(client_id, None)
+                    _pending_usage.pop(client_id, None)
+                cache.delete(key)
             logger.info(f"Rate limit reset for client {client_id[:8]}...")
             return True
             
@@ -2,12 +2,20 @@
 Validation service for public API endpoints.
 Validates video durations and parameters.
 """
+import re
 import logging
 from typing import Tuple
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# YouTube host at the start of the URL (scheme optional), so a YouTube
+# path on another domain is rejected
+_YOUTUBE_URL_RE = re.compile(
+    r'\s*(?:https?://)?(?:www\.|m\.)?(?:youtube\.com|youtu\.be)(?:[/?#]|$)',
+    re.IGNORECASE
+)
+
 
 class ValidationService:
     """Service for validating public API requests."""
@@ -96,11 +104,7 @@ class ValidationService:
             if not url:
                 return (False, "URL is required")
             
-            # Basic check for YouTube domains
-            valid_domains = ['youtube.com', 'youtu.be', 'www.youtube.com', 'm.youtube.com']
-            is_youtube = any(domain in url.lower() for domain in valid_domains)
-            
-            if not is_youtube:
+            if not _YOUTUBE_URL_RE.match(url):
                 return (False, "Invalid YouTube URL")
             
             return (True, "")
@@ -1,21 +1,328 @@
 
 import os
 import sys
+import json
 import logging
 import subprocess
 import re
 import time
-from typing import Optional, Tuple, Dict, Callable
+import shutil
+import threading
+import hashlib
+from typing import Optional, Tuple, Dict, Callable, List
 from datetime import datetime
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# yt-dlp in-process for metadata and stream URL lookups; without it they
+# shell out
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
 
 from src.config import Config
 from src.utils.validators import sanitize_filename
 from src.models.video import Video, VideoStatus
 from src.services import ffmpeg_utils_service
+from src.services.progress_cache import ProgressCache
+from src.services.cache_service import get_cache
+from src.services.encoding_service import EncodingService
 
 logger = logging.getLogger(__name__)
 
+_RESOLUTION_RE = re.compile(r'(\d+)p?')
+
+# Options for metadata-only extraction. YoutubeDL instances are not safe to
+# share between threads, so each thread keeps its own
+_INFO_YDL_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noplaylist': True,
+    'skip_download': True,
+    'socket_timeout': 30,
+    'cachedir': Config.YTDLP_CACHE_DIR,
+    # Same runtime as the CLI's --js-runtimes node; without it yt-dlp looks
+    # for deno, leaves the signature/n challenges unsolved and quietly picks
+    # lower formats
+    'js_runtimes': {'node': {}}
+}
+_ydl_local = threading.local()
+
+# Static parts of the yt-dlp command lines; only the URL, format, section
+# and output path change between calls
+_YTDLP_DL_PREFIX = (sys.executable, '-m', 'yt_dlp', '--js-runtimes', 'node')
+_YTDLP_DL_FLAGS = (
+    '--no-playlist',
+    '--newline',
+    '--cache-dir', Config.YTDLP_CACHE_DIR,
+    '--concurrent-fragments', str(Config.YTDLP_CONCURRENT_FRAGMENTS)
+)
+# Info lookups only shell out when the module is not importable, so they
+# use the yt-dlp executable on PATH
+_YTDLP_INFO_PREFIX = ('yt-dlp',)
+_YTDLP_INFO_FLAGS = (
+    '--dump-json',
+    '--no-playlist',
+    '--no-warnings',
+    '--quiet',
+    '--cache-dir', Config.YTDLP_CACHE_DIR
+)
+
+# Metadata summaries are cached in Redis by URL; titles and durations do
+# not change often enough to matter within a day
+VIDEO_INFO_CACHE_TTL = 86400
+_VIDEO_INFO_PREFIX = "video:info:"
+
+def _info_downloader():
+
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        ydl = _ydl_local.ydl = yt_dlp.YoutubeDL(dict(_INFO_YDL_OPTIONS))
+    return ydl
+
+def _format_downloader(format_string: str):
+
+    # Format selection is fixed per YoutubeDL instance, so each thread keeps
+    # one per format string; there are only a handful of them
+    downloaders = getattr(_ydl_local, 'by_format', None)
+    if downloaders is None:
+        downloaders = _ydl_local.by_format = {}
+    ydl = downloaders.get(format_string)
+    if ydl is None:
+        ydl = downloaders[format_string] = yt_dlp.YoutubeDL(dict(_INFO_YDL_OPTIONS, format=format_string))
+    return ydl
+
+def _best_thumbnail(info: Dict) -> Optional[str]:
+
+    # Unprocessed results carry only the candidate list, not the pick
+    if info.get('thumbnail'):
+        return info['thumbnail']
+    thumbnails = [t for t in info.get('thumbnails') or [] if t.get('url')]
+    if not thumbnails:
+        return None
+    return max(thumbnails, key=lambda t: (t.get('preference', -1), t.get('width') or 0))['url']
+
+def _video_summary(info: Dict) -> Optional[Dict]:
+
+    # An unprocessed result without a title is not a usable lookup; returning
+    # None keeps it out of the info cache
+    if not info.get('title'):
+        return None
+    return {
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'thumbnail': _best_thumbnail(info),
+        'uploader': info.get('uploader')
+    }
+
+# Muxed mp4 streams only exist at low resolutions; at or below this height a
+# progressive stream of exactly the requested height is tried before merging
+_PROGRESSIVE_MAX_HEIGHT = 720
+
+def _format_string_for(resolution: str, format_ext: str) -> str:
+
+    # Handle special cases
+    if resolution == 'best' and format_ext == 'best':
+        return 'bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+
+    if resolution == 'best':
+        if format_ext == 'mp4':
+            return 'bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+        else:
+            return f'bestvideo[ext={format_ext}]+bestaudio/best[ext={format_ext}]/best'
+
+    # Extract height from resolution
+    if resolution.endswith('p'):
+        try:
+            height = int(resolution[:-1])
+        except ValueError:
+            height = None
+    elif resolution.isdigit():
+        height = int(resolution)
+    else:
+        height = None
+
+    # Build format string with resolution constraint
+    if height:
+        if format_ext == 'mp4':
+            merged = f'bestvideo[height<={height}][ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[height<={height}][ext=mp4]/best'
+            if height <= _PROGRESSIVE_MAX_HEIGHT:
+                # Already muxed, so yt-dlp skips the FFmpeg merge pass
+                return f'best[height={height}][ext=mp4]/{merged}'
+            return merged
+        elif format_ext == 'best':
+            return f'bestvideo[height<={height}]+bestaudio/best[height<={height}]'
+        else:
+            return f'bestvideo[height<={height}][ext={format_ext}]+bestaudio/best[height<={height}][ext={format_ext}]/best'
+
+    # Fallback
+    return 'bestvideo+bestaudio/best'
+
+# Every supported (resolution, format) pair is resolved once at import;
+# anything else is built on demand
+_FORMAT_STRINGS = {
+    (resolution, format_ext): _format_string_for(resolution, format_ext)
+    for resolution in Config.SUPPORTED_RESOLUTIONS
+    for format_ext in Config.SUPPORTED_FORMATS
+}
+
+# Source extensions FFmpeg can stream-copy into each output container when
+# downloading a section directly, and the protocols it can fetch on its own
+_DIRECT_COPY_EXTS = {'mp4': ('mp4', 'm4a'), 'webm': ('webm',)}
+_DIRECT_PROTOCOLS = ('http', 'https')
+
+# Minimum time between published download progress updates
+PROGRESS_INTERVAL_NS = 100_000_000
+
+# Bytes requested per os.read() on a yt-dlp output pipe
+PIPE_READ_SIZE = 65536
+
+# Output directories already created by this process; downloads land in a
+# handful of directories, so makedirs only runs the first time for each
+_ensured_dirs = set()
+_ensured_lock = threading.Lock()
+
+def _ensure_dir(path: str):
+
+    if path in _ensured_dirs:
+        return
+    with _ensured_lock:
+        if path not in _ensured_dirs:
+            os.makedirs(path, exist_ok=True)
+            _ensured_dirs.add(path)
+
+def _split_lines(buffer: bytes, chunk: bytes) -> Tuple[list, bytes]:
+
+    # FFmpeg redraws its stats line with '\r'; treat it as a line break
+    lines = (buffer + chunk.replace(b'\r', b'\n')).split(b'\n')
+    return lines[:-1], lines[-1]
+
+def _dispatch_line(on_line: Callable[[str], None], line: bytes):
+
+    # Progress output is ASCII; strip once on the raw bytes and decode
+    # without the UTF-8 machinery (stray bytes become U+FFFD)
+    line = line.strip()
+    if not line:
+        return
+    try:
+        on_line(line.decode('ascii', 'replace'))
+    except Exception as e:
+        logger.error(f"Download progress handler error: {str(e)}")
+
+class _Flight:
+
+    # One call in progress, shared by every concurrent caller with the same
+    # key. Downloads also carry the (video_id, progress_callback) pairs to
+    # report to and the output paths of the callers waiting on it.
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.watchers = []
+        self.followers = []
+        self.results = {}
+
+_info_flights: Dict[str, _Flight] = {}
+
+# Batch lookups resolve their misses on these threads; each keeps its own
+# warm YoutubeDL instance between batches
+INFO_BATCH_WORKERS = 4
+_info_executor = ThreadPoolExecutor(max_workers=INFO_BATCH_WORKERS, thread_name_prefix='video-info')
+_download_flights: Dict[tuple, _Flight] = {}
+_flights_lock = threading.Lock()
+
+def _share_download(result: Tuple[bool, Optional[str], Optional[str]], output_path: str) -> Tuple[bool, Optional[str], Optional[str]]:
+
+    # Give a waiting caller its own name for the finished file; a hard link
+    # outlives the leader's caller deleting or uploading its copy
+    success, file_path, _ = result
+    if not success:
+        return result
+    try:
+        try:
+            os.link(file_path, output_path)
+        except OSError:
+            shutil.copyfile(file_path, output_path)
+        return True, output_path, None
+    except Exception as e:
+        logger.error(f"Could not share download {file_path}: {str(e)}")
+        return False, None, str(e)
+
+def _clip_cache_path(key: tuple, output_path: str) -> Optional[str]:
+
+    # Finished clips are kept under a name derived from the request, so a
+    # repeat of the same clip is a hard link instead of a download
+    if Config.CLIP_CACHE_MAX_MB <= 0:
+        return None
+    digest = hashlib.sha1('|'.join(map(str, key)).encode()).hexdigest()
+    return os.path.join(Config.CLIP_CACHE_DIR, digest + os.path.splitext(output_path)[1])
+
+_clip_trim_lock = threading.Lock()
+
+def _trim_clip_cache():
+
+    # Remove the least recently used clips until the cache fits its cap;
+    # hits touch the mtime. A trim already running covers this one
+    if not _clip_trim_lock.acquire(blocking=False):
+        return
+    try:
+        entries = []
+        total = 0
+        with os.scandir(Config.CLIP_CACHE_DIR) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        limit = Config.CLIP_CACHE_MAX_MB * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    except Exception as e:
+        logger.warning(f"Could not trim clip cache: {str(e)}")
+    finally:
+        _clip_trim_lock.release()
+
+def _store_clip(file_path: str, cached_path: str):
+
+    # A hard link costs no extra disk until the caller's copy is deleted;
+    # without one (different filesystem) the clip is simply not cached
+    try:
+        _ensure_dir(os.path.dirname(cached_path))
+        os.link(file_path, cached_path)
+    except FileExistsError:
+        return
+    except OSError as e:
+        logger.warning(f"Could not cache clip {file_path}: {str(e)}")
+        return
+    threading.Thread(target=_trim_clip_cache, name='clip-cache-trim', daemon=True).start()
+
+class _DownloadState:
+
+    # Per-download progress bookkeeping shared across output lines. watchers
+    # is the flight's list, so callers joining mid-download get updates too
+
+    def __init__(self, total_duration: float, watchers: list):
+        self.total_duration = total_duration
+        self.watchers = watchers
+        self.last_update = 0
+        self.current_pass = 1
+        self.last_current_time = 0
+        self.current_phase = "Downloading (Pass 1)"
+
 class VideoService:
 
     @staticmethod
@@ -30,8 +337,96 @@ class VideoService:
         progress_callback: Optional[Callable[[Dict], None]] = None
     ) -> Tuple[bool, Optional[str], Optional[str]]:
 
+        key = (url, start_time, end_time, format_preference, resolution_preference)
+
+        cached_path = _clip_cache_path(key, output_path)
+        if cached_path:
+            try:
+                _ensure_dir(os.path.dirname(output_path))
+                os.link(cached_path, output_path)
+                os.utime(cached_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not reuse cached clip {cached_path}: {str(e)}")
+            else:
+                logger.info(f"Reusing cached clip: {url} ({start_time}-{end_time}s)")
+                # Same fields the download path publishes, so pollers see it finish
+                if video_id:
+                    ProgressCache.set_progress(video_id, {
+                        'download_progress': 100,
+                        'current_phase': 'downloading',
+                        'speed': "-",
+                        'eta': "0:00"
+                    })
+                if progress_callback:
+                    progress_callback({
+                        'percent': 100,
+                        'size': "Complete",
+                        'speed': "-",
+                        'eta': "0:00",
+                        'phase': "Complete"
+                    })
+                return True, output_path, None
+
+        # Identical clips requested concurrently share one yt-dlp run
+        with _flights_lock:
+            flight = _download_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _download_flights[key] = _Flight()
+            else:
+                flight.followers.append(output_path)
+            flight.watchers.append((video_id, progress_callback))
+
+        if not leader:
+            logger.info(f"Joining in-progress download: {url} ({start_time}-{end_time}s)")
+            flight.done.wait()
+            result = flight.results[output_path]
+            # The leader's final update only reaches its own callback
+            if result[0] and progress_callback:
+                progress_callback({
+                    'percent': 100,
+                    'size': "Complete",
+                    'speed': "-",
+                    'eta': "0:00",
+                    'phase': "Complete"
+                })
+            return result
+
+        result = (False, None, "Download failed")
+        try:
+            result = VideoService._download_video_segment(
+                url, start_time, end_time, output_path, format_preference,
+                resolution_preference, video_id, progress_callback, flight.watchers
+            )
+            if result[0] and cached_path:
+                _store_clip(result[1], cached_path)
+        finally:
+            # No caller can join once the flight is unlisted, so every
+            # follower gets its file before the leader's caller sees it
+            with _flights_lock:
+                _download_flights.pop(key, None)
+            for follower_path in flight.followers:
+                flight.results[follower_path] = _share_download(result, follower_path)
+            flight.done.set()
+        return result
+
+    @staticmethod
+    def _download_video_segment(
+        url: str,
+        start_time: int,
+        end_time: int,
+        output_path: str,
+        format_preference: str,
+        resolution_preference: str,
+        video_id: Optional[str],
+        progress_callback: Optional[Callable[[Dict], None]],
+        watchers: list
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+
         try:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            _ensure_dir(os.path.dirname(output_path))
 
             ffmpeg_path, ffmpeg_dir = ffmpeg_utils_service.get_ffmpeg_path()
             if not ffmpeg_path or not ffmpeg_dir:
@@ -52,106 +447,43 @@ class VideoService:
 
             format_string = VideoService._build_format_string(resolution_preference, actual_format)
 
+            # Resolving the stream URLs in-process lets one FFmpeg process cut
+            # the section, instead of a yt-dlp interpreter driving FFmpeg
+            direct_cmd = VideoService._direct_section_command(
+                url, format_string, actual_format, start_time, end_time, download_path, ffmpeg_path,
+                resolution_height
+            )
+
             cmd = [
-                sys.executable, '-m', 'yt_dlp',
-                '--js-runtimes', 'node',
+                *_YTDLP_DL_PREFIX,
                 url,
                 '-f', format_string,
                 '--merge-output-format', actual_format,
                 '--download-sections', f'*{start_time}-{end_time}',
                 '-o', download_path,
-                '--no-playlist',
-                '--newline'
+                *_YTDLP_DL_FLAGS,
+                # Resolved once per process; yt-dlp also finds ffprobe there
+                '--ffmpeg-location', ffmpeg_dir
             ]
 
-            # Add FFmpeg location
-            env = os.environ.copy()
-            env['PATH'] = ffmpeg_dir + os.pathsep + env.get('PATH', '')
-
             logger.info(f"Starting download: {url} ({start_time}-{end_time}s)")
 
-            process = subprocess.Popen(
-                cmd,
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
-            )
-
-            last_update = 0
-            total_duration = max(end_time - start_time, 1)
-            current_pass = 1
-            last_current_time = 0
-            current_phase = "Downloading (Pass 1)"
-
-            for line in process.stdout:
-                line = line.strip()
-
-                if 'frame=' in line and 'time=' in line:
-                    now = time.time()
-                    # Parse time to detect resets (new pass) even if we throttle updates
-                    time_match = re.search(r'time=(\d+):(\d+):(\d+\.?\d*)', line)
-                    if time_match:
-                        hours = int(time_match.group(1))
-                        minutes = int(time_match.group(2))
-                        seconds = float(time_match.group(3))
-                        current_time = hours * 3600 + minutes * 60 + seconds
-
-                        # Detect time reset indicating a new pass (e.g. Audio after Video)
-                        if last_current_time > 0 and current_time < last_current_time - 10:
-                            current_pass += 1
-                            current_phase = f"Downloading (Pass {current_pass})"
-                            last_current_time = 0 # Reset base
-
-                        last_current_time = current_time
-
-                        if now - last_update >= 0.1:
-                            last_update = now
-
-                            speed_match = re.search(r'speed=\s*(\d+\.?\d*)x', line)
-                            size_match = re.search(r'size=\s*(\d+)KiB', line)
-
-                            percent = (current_time / total_duration * 100)
-                            percent = min(percent, 100)
-
-                            speed_str = f"{speed_match.group(1)}x" if speed_match else "?"
-                            size_str = f"{int(size_match.group(1)) / 1024:.1f}MB" if size_match else "?"
-
-                            eta_seconds = ((total_duration - current_time) / float(speed_match.group(1))) if speed_match and float(speed_match.group(1)) > 0 else 0
-                            eta_str = f"{int(eta_seconds//60)}:{int(eta_seconds%60):02d}" if eta_seconds > 0 else "?"
-
-                            progress_data = {
-                                'percent': percent,
-                                'size': size_str,
-                                'speed': speed_str,
-                                'eta': eta_str,
-                                'phase': current_phase
-                            }
-
-                            if video_id:
-                                from src.services.progress_cache import ProgressCache
-                                ProgressCache.set_progress(video_id, {
-                                    'download_progress': progress_data['percent'],
-                                    'current_phase': 'downloading',
-                                    'speed': progress_data['speed'],
-                                    'eta': progress_data['eta']
-                                })
-
-                            if progress_callback:
-                                progress_callback(progress_data)
-
-                elif '[Merger]' in line or 'Merging' in line.lower():
-                    if video_id:
-                        from src.services.progress_cache import ProgressCache
-                        ProgressCache.update_field(video_id, 'current_phase', 'merging')
-                    if progress_callback:
-                        progress_callback({'phase': 'Merging', 'percent': 100})
+            returncode = None
+            if direct_cmd:
+                returncode = VideoService._run_download(direct_cmd, end_time - start_time, watchers)
+                if returncode != 0:
+                    logger.warning(f"Direct section copy failed (exit code {returncode}), retrying with yt-dlp")
+                    # yt-dlp would take a partial file for a finished download
+                    try:
+                        os.remove(download_path)
+                    except FileNotFoundError:
+                        pass
 
-            process.wait()
+            if returncode != 0:
+                returncode = VideoService._run_download(cmd, end_time - start_time, watchers)
 
             # Ensure we report 100% at the end
-            if process.returncode == 0 and progress_callback:
+            if returncode == 0 and progress_callback:
                 progress_callback({
                     'percent': 100,
                     'size': "Complete",
@@ -160,8 +492,8 @@ class VideoService:
                     'phase': "Complete"
                 })
 
-            if process.returncode != 0:
-                error_msg = f"yt-dlp failed (exit code {process.returncode})"
+            if returncode != 0:
+                error_msg = f"yt-dlp failed (exit code {returncode})"
                 logger.error(error_msg)
                 return False, None, error_msg
 
@@ -171,8 +503,6 @@ class VideoService:
                 return False, None, error_msg
 
             if needs_encoding:
-                from src.services.encoding_service import EncodingService
-
                 logger.info(f"Encoding {download_path} to {output_path}")
 
                 success, error = EncodingService.encode_video_to_mp4(
@@ -182,7 +512,8 @@ class VideoService:
                     quality_preset='lossless',
                     use_gpu=True,
                     encode_id=video_id,
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    duration=end_time - start_time
                 )
 
                 if success:
@@ -194,10 +525,13 @@ class VideoService:
                     'phase': "Complete"
                     })
 
+                # Existence was checked above; only a concurrent delete can
+                # make the remove miss
                 try:
-                    if os.path.exists(download_path):
-                        os.remove(download_path)
-                        logger.info(f"Removed temp file: {download_path}")
+                    os.remove(download_path)
+                    logger.info(f"Removed temp file: {download_path}")
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     logger.warning(f"Could not remove temp file: {e}")
 
@@ -225,13 +559,161 @@ class VideoService:
         finally:
             pass
 
+    @staticmethod
+    def _direct_section_command(
+        url: str,
+        format_string: str,
+        output_format: str,
+        start_time: int,
+        end_time: int,
+        output_path: str,
+        ffmpeg_path: str,
+        requested_height: int = 0
+    ) -> Optional[list]:
+
+        # None when the selected formats need yt-dlp itself (fragmented
+        # protocols, live streams, or codecs the container cannot hold), or
+        # when selection fell back below the requested height
+        if yt_dlp is None or output_format not in _DIRECT_COPY_EXTS:
+            return None
+
+        try:
+            info = _format_downloader(format_string).extract_info(url, download=False)
+        except Exception as e:
+            logger.warning(f"Could not resolve stream URLs for {url}: {str(e)}")
+            return None
+
+        if not info or info.get('is_live'):
+            return None
+
+        formats = info.get('requested_formats') or [info]
+        for fmt in formats:
+            if (not fmt.get('url') or fmt.get('protocol') not in _DIRECT_PROTOCOLS
+                    or fmt.get('ext') not in _DIRECT_COPY_EXTS[output_format]):
+                return None
+
+        if requested_height:
+            height = max((fmt.get('height') or 0 for fmt in formats), default=0)
+            if height < requested_height:
+                logger.warning(f"Resolved {height}p for a {requested_height}p request, leaving {url} to yt-dlp")
+                return None
+
+        cmd = [ffmpeg_path, '-hide_banner', '-nostdin', '-y']
+        for fmt in formats:
+            headers = ''.join(f'{name}: {value}\r\n' for name, value in (fmt.get('http_headers') or {}).items())
+            if headers:
+                cmd.extend(['-headers', headers])
+            cmd.extend(['-ss', str(start_time), '-t', str(end_time - start_time), '-i', fmt['url']])
+        if len(formats) > 1:
+            for index in range(len(formats)):
+                cmd.extend(['-map', str(index)])
+        cmd.extend(['-c', 'copy', output_path])
+        return cmd
+
+    @staticmethod
+    def _run_download(cmd: list, duration: float, watchers: list) -> int:
+
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0
+        )
+
+        state = _DownloadState(max(duration, 1), watchers)
+        on_line = lambda line: VideoService._handle_line(line, state)
+
+        # Large unbuffered reads instead of line iteration; the download
+        # thread reads its own pipe until yt-dlp closes it
+        fd = process.stdout.fileno()
+        buffer = b''
+        try:
+            while True:
+                chunk = os.read(fd, PIPE_READ_SIZE)
+                if not chunk:
+                    break
+                lines, buffer = _split_lines(buffer, chunk)
+                for line in lines:
+                    _dispatch_line(on_line, line)
+            _dispatch_line(on_line, buffer)
+        finally:
+            process.stdout.close()
+            process.wait()
+        return process.returncode
+
+    @staticmethod
+    def _handle_line(line: str, state: _DownloadState):
+
+        # FFmpeg stats lines always begin with frame=; anything else skips
+        # the scan for time= entirely
+        if line.startswith('frame=') and 'time=' in line:
+            # Parse time to detect resets (new pass) even if we throttle updates
+            current_time = ffmpeg_utils_service.parse_progress_time(line)
+            if current_time is not None:
+                # Detect time reset indicating a new pass (e.g. Audio after Video)
+                if state.last_current_time > 0 and current_time < state.last_current_time - 10:
+                    state.current_pass += 1
+                    state.current_phase = f"Downloading (Pass {state.current_pass})"
+                    state.last_current_time = 0 # Reset base
+
+                state.last_current_time = current_time
+
+                # Integer monotonic clock: cheap to compare on every stats
+                # line and unaffected by wall-clock adjustments
+                now = time.monotonic_ns()
+                if now - state.last_update >= PROGRESS_INTERVAL_NS:
+                    state.last_update = now
+
+                    # Sectioned downloads are run by FFmpeg, whose stats
+                    # line is split into fields rather than regex-matched
+                    stats = ffmpeg_utils_service.parse_stats_line(line)
+                    speed_field = stats.get('speed', '')
+                    size_field = stats.get('size', '')
+
+                    percent = (current_time / state.total_duration * 100)
+                    percent = min(percent, 100)
+
+                    speed = float(speed_field[:-1]) if speed_field.endswith('x') else 0
+                    speed_str = speed_field if speed else "?"
+                    size_str = f"{int(size_field[:-3]) / 1024:.1f}MB" if size_field[:-3].isdigit() and size_field.endswith('KiB') else "?"
+
+                    eta_seconds = ((state.total_duration - current_time) / speed) if speed > 0 else 0
+                    eta_str = f"{int(eta_seconds//60)}:{int(eta_seconds%60):02d}" if eta_seconds > 0 else "?"
+
+                    progress_data = {
+                        'percent': percent,
+                        'size': size_str,
+                        'speed': speed_str,
+                        'eta': eta_str,
+                        'phase': state.current_phase
+                    }
+
+                    for video_id, progress_callback in state.watchers:
+                        if video_id:
+                            ProgressCache.set_progress(video_id, {
+                                'download_progress': progress_data['percent'],
+                                'current_phase': 'downloading',
+                                'speed': progress_data['speed'],
+                                'eta': progress_data['eta']
+                            })
+
+                        if progress_callback:
+                            progress_callback(progress_data)
+
+        elif line.startswith('[Merger]') or 'Merging' in line or 'merging' in line:
+            for video_id, progress_callback in state.watchers:
+                if video_id:
+                    ProgressCache.update_field(video_id, 'current_phase', 'merging')
+                if progress_callback:
+                    progress_callback({'phase': 'Merging', 'percent': 100})
+
     @staticmethod
     def _extract_resolution_height(resolution: str) -> int:
 
         if resolution in ['best', 'worst']:
             return 0
 
-        match = re.search(r'(\d+)p?', resolution)
+        match = _RESOLUTION_RE.search(resolution)
         if match:
             return int(match.group(1))
 
@@ -240,72 +722,102 @@ class VideoService:
     @staticmethod
     def _build_format_string(resolution: str, format_ext: str) -> str:
 
-        # Handle special cases
-        if resolution == 'best' and format_ext == 'best':
-            return 'bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+        format_string = _FORMAT_STRINGS.get((resolution, format_ext))
+        if format_string is None:
+            format_string = _format_string_for(resolution, format_ext)
+        return format_string
 
-        if resolution == 'best':
-            if format_ext == 'mp4':
-                return 'bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[ext=mp4]/best'
-            else:
-                return f'bestvideo[ext={format_ext}]+bestaudio/best[ext={format_ext}]/best'
+    @staticmethod
+    def get_video_info(url: str) -> Optional[Dict]:
 
-        # Extract height from resolution
-        if resolution.endswith('p'):
-            try:
-                height = int(resolution[:-1])
-            except ValueError:
-                height = None
-        elif resolution.isdigit():
-            height = int(resolution)
-        else:
-            height = None
+        cache = get_cache()
+        key = _VIDEO_INFO_PREFIX + hashlib.sha1(url.encode()).hexdigest()
+        if cache.connected:
+            cached = cache.get(key)
+            if cached:
+                return cached
 
-        # Build format string with resolution constraint
-        if height:
-            if format_ext == 'mp4':
-                return f'bestvideo[height<={height}][ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/best[height<={height}][ext=mp4]/best'
-            elif format_ext == 'best':
-                return f'bestvideo[height<={height}]+bestaudio/best[height<={height}]'
-            else:
-                return f'bestvideo[height<={height}][ext={format_ext}]+bestaudio/best[height<={height}][ext={format_ext}]/best'
+        result, fetched = VideoService._shared_video_info(url)
+        if fetched and result and cache.connected:
+            cache.set(key, result, VIDEO_INFO_CACHE_TTL)
+        return result
 
-        # Fallback
-        return 'bestvideo+bestaudio/best'
+    @staticmethod
+    def get_video_info_batch(urls: List[str]) -> Dict[str, Optional[Dict]]:
+
+        # Cached summaries come back in one MGET; misses are looked up in
+        # parallel and the new summaries stored in one pipelined write
+        urls = list(dict.fromkeys(urls))
+        keys = [_VIDEO_INFO_PREFIX + hashlib.sha1(url.encode()).hexdigest() for url in urls]
+        cache = get_cache()
+        cached = cache.get_many(keys) if cache.connected else [None] * len(urls)
+
+        results = {url: info for url, info in zip(urls, cached) if info}
+        misses = [(url, key) for url, key in zip(urls, keys) if url not in results]
+        if not misses:
+            return results
+
+        lookups = _info_executor.map(VideoService._shared_video_info, [url for url, _ in misses])
+        fetched = {}
+        for (url, key), (result, leader) in zip(misses, lookups):
+            results[url] = result
+            if leader and result:
+                fetched[key] = result
+
+        if fetched and cache.connected:
+            cache.set_many(fetched, VIDEO_INFO_CACHE_TTL)
+        return results
 
     @staticmethod
-    def get_video_info(url: str) -> Optional[Dict]:
+    def _shared_video_info(url: str) -> Tuple[Optional[Dict], bool]:
+
+        # Concurrent lookups of the same URL wait for the first one; the
+        # flag tells the caller whether it did the lookup (and so caches it)
+        with _flights_lock:
+            flight = _info_flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = _info_flights[url] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.result, False
 
         try:
-            cmd = [
-                sys.executable, '-m', 'yt_dlp',
-                url,
-                '--dump-json',
-                '--no-playlist',
-                '--no-warnings',
-                '--quiet'
-            ]
+            flight.result = VideoService._fetch_video_info(url)
+        finally:
+            with _flights_lock:
+                _info_flights.pop(url, None)
+            flight.done.set()
+        return flight.result, True
+
+    @staticmethod
+    def _fetch_video_info(url: str) -> Optional[Dict]:
+
+        try:
+            if yt_dlp is not None:
+                # No interpreter start-up per lookup, and process=False
+                # skips format selection, which metadata does not need
+                info = _info_downloader().extract_info(url, download=False, process=False)
+                if not info:
+                    return None
 
+                return _video_summary(info)
+
+            cmd = [*_YTDLP_INFO_PREFIX, url, *_YTDLP_INFO_FLAGS]
+
+            # Bytes output, parsed without decoding to str first
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
                 timeout=30
             )
 
             if result.returncode != 0:
-                logger.error(f"Failed to get video info: {result.stderr}")
+                logger.error(f"Failed to get video info: {result.stderr.decode(errors='replace')}")
                 return None
 
-            import json
-            info = json.loads(result.stdout)
-
-            return {
-                'title': info.get('title'),
-                'duration': info.get('duration'),
-                'thumbnail': info.get('thumbnail'),
-                'uploader': info.get('uploader')
-            }
+            return _video_summary(_json_loads(result.stdout))
 
         except Exception as e:
             logger.error(f"Get video info error: {str(e)}")
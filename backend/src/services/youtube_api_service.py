@@ -1,17 +1,157 @@
 """YouTube Data API service for accessing live chat and stream data using OAuth."""
 import logging
+import hashlib
+import threading
+import time
 import requests
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Tuple, List
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts for Data API calls
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Seconds read-mostly lookups are reused for. A live video's chat ID and a
+# token's channel do not change mid-stream; stream details carry the
+# start/end times, so they are kept briefly
+LIVE_CHAT_ID_TTL_SECONDS = 300
+STREAM_DETAILS_TTL_SECONDS = 60
+USER_CHANNEL_TTL_SECONDS = 3600
+# A live chat belongs to one video for its whole life, so the reverse
+# mapping is kept for an hour; a miss costs a 100-unit search call
+VIDEO_FOR_CHAT_TTL_SECONDS = 3600
+LOOKUP_CACHE_MAX_ENTRIES = 1024
+
+# Request digest -> (ETag, parsed body) of the last 200 response from an
+# endpoint that honours If-None-Match; a 304 revalidation reuses the body
+ETAG_CACHE_MAX_ENTRIES = 2048
+_etag_cache: Dict[str, Tuple[str, Dict]] = {}
+_etag_lock = threading.Lock()
+
+# (lookup, id, credential digest) -> (fetched_at, result); only successful
+# lookups are stored
+_lookup_cache: Dict[tuple, Tuple[float, object]] = {}
+_lookup_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    """A live chat message; slotted, since a chat page builds up to 200 of them."""
+    id: str
+    author_channel_id: str
+    author_display_name: str
+    message_text: str
+    published_at: datetime
+    video_id: str
+
+
+def _parse_api_time(value: str) -> datetime:
+    """Parse an API timestamp such as 2024-01-01T12:00:00.5Z into an aware datetime."""
+    # fromisoformat is implemented in C and reads the 'Z' suffix itself
+    # (Python 3.11+), so no per-call string rewrite is needed
+    return datetime.fromisoformat(value)
+
+
+def _credential_digest(access_token: Optional[str], api_key: Optional[str] = None) -> str:
+    """Short digest of the credential a lookup ran with, so tokens are never kept as keys."""
+    return hashlib.sha1((api_key or access_token or '').encode()).hexdigest()[:16]
+
+
+def _cached_lookup(key: tuple, ttl: int):
+    """Return a cached lookup result younger than ttl seconds, or None."""
+    with _lookup_lock:
+        cached = _lookup_cache.get(key)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    return None
+
+
+def _store_lookup(key: tuple, value):
+    """Cache a successful lookup result."""
+    with _lookup_lock:
+        if len(_lookup_cache) >= LOOKUP_CACHE_MAX_ENTRIES:
+            _lookup_cache.clear()
+        _lookup_cache[key] = (time.monotonic(), value)
+
+
+def _remember_chat_video(live_chat_id: Optional[str], video_id: Optional[str]):
+    """Record which video a live chat belongs to; the pair is public, so it is not keyed by credential."""
+    if live_chat_id and video_id:
+        _store_lookup(('video_for_chat', live_chat_id), video_id)
+
 
 class YouTubeAPIService:
     """Service for interacting with YouTube Data API v3 using OAuth tokens or API Key."""
     
     API_BASE_URL = "https://www.googleapis.com/youtube/v3"
     
+    # Shared keep-alive session, so calls after the first skip the TCP and
+    # TLS handshakes with googleapis.com; created on first use
+    _session = None
+    _session_lock = threading.Lock()
+    
+    @staticmethod
+    def _http() -> requests.Session:
+        """Get the shared HTTP session, creating it on first use."""
+        if YouTubeAPIService._session is None:
+            with YouTubeAPIService._session_lock:
+                if YouTubeAPIService._session is None:
+                    # Transient quota/server errors are retried; the final
+                    # response is still returned for the status checks below
+                    retry = Retry(
+                        total=3,
+                        backoff_factor=0.2,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        raise_on_status=False
+                    )
+                    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    YouTubeAPIService._session = session
+        return YouTubeAPIService._session
+    
+    @staticmethod
+    def _conditional_get(url: str, params: Dict, headers: Dict) -> Tuple[int, Optional[Dict], str]:
+        """
+        GET a Data API resource, revalidating a previously fetched copy by ETag.
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters, including any API key
+            headers: Request headers, including any Authorization
+            
+        Returns:
+            Tuple of (status_code, parsed body or None, error text); a 304 is
+            reported as 200 with the cached body
+        """
+        # Digest rather than raw params/headers, so credentials are not kept
+        key = hashlib.sha1(repr((url, sorted(params.items()), headers.get('Authorization'))).encode()).hexdigest()
+        with _etag_lock:
+            cached = _etag_cache.get(key)
+        if cached:
+            headers = {**headers, 'If-None-Match': cached[0]}
+        
+        response = YouTubeAPIService._http().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code == 304 and cached:
+            return 200, cached[1], ''
+        if response.status_code != 200:
+            return response.status_code, None, response.text
+        
+        data = response.json()
+        etag = response.headers.get('ETag') or data.get('etag')
+        if etag:
+            with _etag_lock:
+                if len(_etag_cache) >= ETAG_CACHE_MAX_ENTRIES:
+                    _etag_cache.clear()
+                _etag_cache[key] = (etag, data)
+        return 200, data, ''
+    
     @staticmethod
     def get_chat_message_by_id(
         chat_id: str,
@@ -47,7 +187,7 @@ class YouTubeAPIService:
                 logger.error("No authentication provided (api_key or access_token required)")
                 return None
             
-            response = requests.get(url, params=params, headers=headers)
+            response = YouTubeAPIService._http().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
                 logger.error(f"YouTube API error: {response.status_code} - {response.text}")
@@ -70,7 +210,7 @@ class YouTubeAPIService:
             published_at = None
             if published_at_str:
                 try:
-                    published_at = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
+                    published_at = _parse_api_time(published_at_str)
                 except ValueError as e:
                     logger.error(f"Failed to parse timestamp: {e}")
             
@@ -104,6 +244,12 @@ class YouTubeAPIService:
         Returns:
             Video ID as string, or None if not found
         """
+        # Pairs seen by get_live_chat_id/get_video_stream_details or an
+        # earlier lookup spare the liveBroadcasts and search calls
+        video_id = _cached_lookup(('video_for_chat', live_chat_id), VIDEO_FOR_CHAT_TTL_SECONDS)
+        if video_id:
+            return video_id
+        
         try:
             headers = {}
             auth_params = {}
@@ -126,10 +272,10 @@ class YouTubeAPIService:
                 **auth_params
             }
             
-            response = requests.get(url, params=params, headers=headers)
+            status, data, _ = YouTubeAPIService._conditional_get(url, params, headers)
             
             # If liveBroadcasts doesn't work, try searching through videos
-            if response.status_code != 200 or not response.json().get('items'):
+            if status != 200 or not data.get('items'):
                 # Alternative: search through active live streams
                 url = f"{YouTubeAPIService.API_BASE_URL}/search"
                 params = {
@@ -137,51 +283,60 @@ class YouTubeAPIService:
                     'eventType': 'live',
                     'type': 'video',
                     'maxResults': 50,
+                    # Only the IDs are used; the partial response skips the
+                    # rest of each search result
+                    'fields': 'items(id/videoId)',
                     **auth_params
                 }
                 
-                response = requests.get(url, params=params, headers=headers)
+                response = YouTubeAPIService._http().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
                 
                 if response.status_code != 200:
                     logger.error(f"YouTube API error: {response.status_code} - {response.text}")
                     return None
                 
                 data = response.json()
+                video_ids = [item['id'].get('videoId') for item in data.get('items', [])]
+                video_ids = [video_id for video_id in video_ids if video_id]
                 
-                # Check each live video for matching liveChatId
-                for item in data.get('items', []):
-                    video_id = item['id'].get('videoId')
-                    if not video_id:
-                        continue
-                    
-                    # Get full details for this video
+                if video_ids:
+                    # videos.list takes up to 50 comma-separated IDs, so every
+                    # search hit is checked with one request instead of one each
                     video_url = f"{YouTubeAPIService.API_BASE_URL}/videos"
                     video_params = {
                         'part': 'liveStreamingDetails',
-                        'id': video_id
+                        'id': ','.join(video_ids[:50]),
+                        'fields': 'items(id,liveStreamingDetails/activeLiveChatId)',
+                        **auth_params
                     }
                     
-                    video_response = requests.get(video_url, params=video_params, headers=headers)
+                    video_status, video_data, error_text = YouTubeAPIService._conditional_get(video_url, video_params, headers)
                     
-                    if video_response.status_code == 200:
-                        video_data = video_response.json()
-                        items = video_data.get('items', [])
-                        
-                        if items:
-                            video_live_chat_id = items[0].get('liveStreamingDetails', {}).get('activeLiveChatId')
-                            if video_live_chat_id == live_chat_id:
-                                logger.info(f"Found video {video_id} for live chat {live_chat_id}")
-                                return video_id
+                    if video_status == 200:
+                        found = None
+                        for video in video_data.get('items', []):
+                            video_live_chat_id = video.get('liveStreamingDetails', {}).get('activeLiveChatId')
+                            # Every live video in the probe is remembered, not
+                            # just the match, so later chats skip the search
+                            _remember_chat_video(video_live_chat_id, video.get('id'))
+                            if found is None and video_live_chat_id == live_chat_id:
+                                found = video['id']
+                        if found:
+                            logger.info(f"Found video {found} for live chat {live_chat_id}")
+                            return found
+                    else:
+                        logger.error(f"YouTube API error: {video_status} - {error_text}")
                 
                 logger.warning(f"No video found for live chat ID: {live_chat_id}")
                 return None
             
-            data = response.json()
             items = data.get('items', [])
             
             if items:
                 # Get the video ID from the broadcast
-                return items[0].get('id')
+                video_id = items[0].get('id')
+                _remember_chat_video(live_chat_id, video_id)
+                return video_id
             
             return None
             
@@ -232,7 +387,7 @@ class YouTubeAPIService:
             return None
     
     @staticmethod
-    def get_chat_messages_for_stream(video_id: str, access_token: str, max_results: int = 200) -> Optional[List[Dict]]:
+    def get_chat_messages_for_stream(video_id: str, access_token: str, max_results: int = 200) -> Optional[List[ChatMessage]]:
         """
         Get live chat messages for a video/stream.
         
@@ -242,52 +397,72 @@ class YouTubeAPIService:
             max_results: Maximum messages to retrieve
             
         Returns:
-            List of chat message dicts or None
+            List of ChatMessage objects or None
         """
         try:
-            # First, get the live chat ID for the video
-            live_chat_id = YouTubeAPIService.get_live_chat_id(video_id, access_token)
-            
-            if not live_chat_id:
-                logger.error(f"No live chat ID found for video {video_id}")
+            items = YouTubeAPIService._fetch_chat_items(video_id, access_token, max_results)
+            if items is None:
                 return None
             
-            # Fetch chat messages
-            url = f"{YouTubeAPIService.API_BASE_URL}/liveChat/messages"
-            params = {
-                'liveChatId': live_chat_id,
-                'part': 'id,snippet,authorDetails',
-                'maxResults': max_results
-            }
-            headers = {
-                'Authorization': f'Bearer {access_token}'
-            }
-            
-            response = requests.get(url, params=params, headers=headers)
-            
-            if response.status_code != 200:
-                logger.error(f"YouTube API error: {response.status_code} - {response.text}")
-                return None
-            
-            data = response.json()
-            messages = []
-            
-            for item in data.get('items', []):
-                messages.append({
-                    'id': item['id'],
-                    'author_channel_id': item['authorDetails']['channelId'],
-                    'author_display_name': item['authorDetails']['displayName'],
-                    'message_text': item['snippet']['displayMessage'],
-                    'published_at': datetime.fromisoformat(item['snippet']['publishedAt'].replace('Z', '+00:00')),
-                    'video_id': video_id
-                })
-            
-            return messages
+            return [YouTubeAPIService._chat_message(item, video_id) for item in items]
             
         except Exception as e:
             logger.error(f"Failed to get chat messages: {str(e)}")
             return None
     
+    @staticmethod
+    def _fetch_chat_items(video_id: str, access_token: str, max_results: int) -> Optional[List[Dict]]:
+        """
+        Fetch the raw liveChatMessages items for a video's live chat.
+        
+        Args:
+            video_id: YouTube video ID
+            access_token: OAuth access token
+            max_results: Maximum messages to retrieve
+            
+        Returns:
+            List of API items or None
+        """
+        # First, get the live chat ID for the video
+        live_chat_id = YouTubeAPIService.get_live_chat_id(video_id, access_token)
+        
+        if not live_chat_id:
+            logger.error(f"No live chat ID found for video {video_id}")
+            return None
+        
+        # Fetch chat messages
+        url = f"{YouTubeAPIService.API_BASE_URL}/liveChat/messages"
+        params = {
+            'liveChatId': live_chat_id,
+            'part': 'id,snippet,authorDetails',
+            'maxResults': max_results
+        }
+        headers = {
+            'Authorization': f'Bearer {access_token}'
+        }
+        
+        response = YouTubeAPIService._http().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code != 200:
+            logger.error(f"YouTube API error: {response.status_code} - {response.text}")
+            return None
+        
+        return response.json().get('items', [])
+    
+    @staticmethod
+    def _chat_message(item: Dict, video_id: str) -> ChatMessage:
+        """Build a ChatMessage from a liveChatMessages item."""
+        author = item['authorDetails']
+        snippet = item['snippet']
+        return ChatMessage(
+            id=item['id'],
+            author_channel_id=author['channelId'],
+            author_display_name=author['displayName'],
+            message_text=snippet['displayMessage'],
+            published_at=_parse_api_time(snippet['publishedAt']),
+            video_id=video_id
+        )
+    
     @staticmethod
     def get_live_chat_id(video_id: str, access_token: str) -> Optional[str]:
         """
@@ -300,6 +475,11 @@ class YouTubeAPIService:
         Returns:
             Live chat ID or None
         """
+        cache_key = ('live_chat_id', video_id, _credential_digest(access_token))
+        live_chat_id = _cached_lookup(cache_key, LIVE_CHAT_ID_TTL_SECONDS)
+        if live_chat_id:
+            return live_chat_id
+        
         try:
             url = f"{YouTubeAPIService.API_BASE_URL}/videos"
             params = {
@@ -310,13 +490,12 @@ class YouTubeAPIService:
                 'Authorization': f'Bearer {access_token}'
             }
             
-            response = requests.get(url, params=params, headers=headers)
+            status, data, error_text = YouTubeAPIService._conditional_get(url, params, headers)
             
-            if response.status_code != 200:
-                logger.error(f"YouTube API error: {response.status_code} - {response.text}")
+            if status != 200:
+                logger.error(f"YouTube API error: {status} - {error_text}")
                 return None
             
-            data = response.json()
             items = data.get('items', [])
             
             if not items:
@@ -324,6 +503,9 @@ class YouTubeAPIService:
                 return None
             
             live_chat_id = items[0].get('liveStreamingDetails', {}).get('activeLiveChatId')
+            if live_chat_id:
+                _store_lookup(cache_key, live_chat_id)
+                _remember_chat_video(live_chat_id, video_id)
             return live_chat_id
             
         except Exception as e:
@@ -347,6 +529,11 @@ class YouTubeAPIService:
         Returns:
             Dict containing stream details or None
         """
+        cache_key = ('stream_details', video_id, _credential_digest(access_token, api_key))
+        details = _cached_lookup(cache_key, STREAM_DETAILS_TTL_SECONDS)
+        if details:
+            return details
+        
         try:
             url = f"{YouTubeAPIService.API_BASE_URL}/videos"
             
@@ -364,13 +551,12 @@ class YouTubeAPIService:
                 logger.error("No authentication provided")
                 return None
             
-            response = requests.get(url, params=params, headers=headers)
+            status, data, error_text = YouTubeAPIService._conditional_get(url, params, headers)
             
-            if response.status_code != 200:
-                logger.error(f"YouTube API error: {response.status_code} - {response.text}")
+            if status != 200:
+                logger.error(f"YouTube API error: {status} - {error_text}")
                 return None
             
-            data = response.json()
             items = data.get('items', [])
             
             if not items:
@@ -384,15 +570,18 @@ class YouTubeAPIService:
             actual_start = live_details.get('actualStartTime')
             actual_end = live_details.get('actualEndTime')
             scheduled_start = live_details.get('scheduledStartTime')
+            _remember_chat_video(live_details.get('activeLiveChatId'), video_id)
             
-            return {
+            details = {
                 'video_id': video_id,
                 'title': snippet.get('title'),
-                'actual_start_time': datetime.fromisoformat(actual_start.replace('Z', '+00:00')) if actual_start else None,
-                'actual_end_time': datetime.fromisoformat(actual_end.replace('Z', '+00:00')) if actual_end else None,
-                'scheduled_start_time': datetime.fromisoformat(scheduled_start.replace('Z', '+00:00')) if scheduled_start else None,
+                'actual_start_time': _parse_api_time(actual_start) if actual_start else None,
+                'actual_end_time': _parse_api_time(actual_end) if actual_end else None,
+                'scheduled_start_time': _parse_api_time(scheduled_start) if scheduled_start else None,
                 'is_live': actual_start and not actual_end
             }
+            _store_lookup(cache_key, details)
+            return details
             
         except Exception as e:
             logger.error(f"Failed to get video stream details: {str(e)}")
@@ -440,6 +629,13 @@ class YouTubeAPIService:
         Returns:
             True if the author is the authenticated user, False otherwise
         """
+        # The token's own channel is cached, not the comparison, so one
+        # lookup serves every author checked with the same token
+        cache_key = ('user_channel', None, _credential_digest(access_token))
+        user_channel_id = _cached_lookup(cache_key, USER_CHANNEL_TTL_SECONDS)
+        if user_channel_id:
+            return user_channel_id == author_channel_id
+        
         try:
             # Get the authenticated user's channel
             url = f"{YouTubeAPIService.API_BASE_URL}/channels"
@@ -451,7 +647,7 @@ class YouTubeAPIService:
                 'Authorization': f'Bearer {access_token}'
             }
             
-            response = requests.get(url, params=params, headers=headers)
+            response = YouTubeAPIService._http().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
                 logger.error(f"YouTube API error: {response.status_code} - {response.text}")
@@ -464,6 +660,7 @@ class YouTubeAPIService:
                 return False
             
             user_channel_id = items[0]['id']
+            _store_lookup(cache_key, user_channel_id)
             return user_channel_id == author_channel_id
             
         except Exception as e:
@@ -471,7 +668,7 @@ class YouTubeAPIService:
             return False
     
     @staticmethod
-    def find_chat_message_by_text(video_id: str, message_text: str, access_token: str, time_window_minutes: int = 5) -> Optional[Dict]:
+    def find_chat_message_by_text(video_id: str, message_text: str, access_token: str, time_window_minutes: int = 5) -> Optional[ChatMessage]:
         """
         Find a recent chat message by its text content.
         Useful for finding a message when we only have the message content.
@@ -483,19 +680,24 @@ class YouTubeAPIService:
             time_window_minutes: How far back to search (default 5 minutes)
             
         Returns:
-            Chat message dict or None
+            ChatMessage or None
         """
         try:
-            messages = YouTubeAPIService.get_chat_messages_for_stream(video_id, access_token, max_results=200)
+            items = YouTubeAPIService._fetch_chat_items(video_id, access_token, 200)
             
-            if not messages:
+            if not items:
                 return None
             
-            # Filter messages by time window and text match
-            cutoff_time = datetime.utcnow() - timedelta(minutes=time_window_minutes)
+            # Published times are timezone-aware, so the cutoff must be too
+            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=time_window_minutes)
             
-            for msg in messages:
-                if msg['published_at'] >= cutoff_time and message_text in msg['message_text']:
+            # Match the text on the raw items first; only candidates pay for
+            # building the message and parsing its timestamp
+            for item in items:
+                if message_text not in item['snippet']['displayMessage']:
+                    continue
+                msg = YouTubeAPIService._chat_message(item, video_id)
+                if msg.published_at >= cutoff_time:
                     return msg
             
             return None
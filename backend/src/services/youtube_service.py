@@ -1,23 +1,70 @@
 
+import sys
 import logging
 import re
 from typing import Optional, Dict, Tuple
 import subprocess
 import json
+import threading
+from collections import deque
+
+# yt-dlp --dump-json output runs to hundreds of KB; orjson parses it faster
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# yt-dlp in-process for info lookups; without it they shell out
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+
+from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# YoutubeDL instances are not thread-safe, so each thread keeps its own and
+# reuses it (and its HTTP session) across lookups
+_YDL_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noplaylist': True,
+    'skip_download': True,
+    'socket_timeout': 30,
+    'cachedir': Config.YTDLP_CACHE_DIR
+}
+_ydl_local = threading.local()
+
+def _downloader():
+
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        ydl = _ydl_local.ydl = yt_dlp.YoutubeDL(dict(_YDL_OPTIONS))
+    return ydl
+
+# Lines of yt-dlp stderr kept for the error log of a failed download
+STDERR_TAIL_LINES = 50
+
+# Fixed part of the segment download command, built once at import
+_YTDLP_SEGMENT_PREFIX = (
+    sys.executable, '-m', 'yt_dlp',
+    '--force-overwrites',
+    '--no-warnings',
+    '--no-progress',
+    '--cache-dir', Config.YTDLP_CACHE_DIR,
+    '--concurrent-fragments', str(Config.YTDLP_CONCURRENT_FRAGMENTS)
+)
+
 class YouTubeService:
 
     # YouTube video ID format: 11 characters, alphanumeric, underscore, and hyphen
     VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{11}$')
 
-    # URL patterns for extracting video IDs
-    URL_PATTERNS = [
-        re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]{11})'),
-        re.compile(r'youtube\.com\/embed\/([a-zA-Z0-9_-]{11})'),
-        re.compile(r'youtube\.com\/v\/([a-zA-Z0-9_-]{11})'),
-    ]
+    # watch?v=, youtu.be/, embed/ and v/ URLs in one alternation, so the
+    # URL is scanned once
+    URL_PATTERN = re.compile(r'(?:youtube\.com/(?:watch\?v=|embed/|v/)|youtu\.be/)([a-zA-Z0-9_-]{11})')
 
     @staticmethod
     def validate_video_id(video_id: str) -> Tuple[bool, Optional[str]]:
@@ -39,11 +86,9 @@ class YouTubeService:
         if not url:
             return None
 
-        # Try each URL pattern
-        for pattern in YouTubeService.URL_PATTERNS:
-            match = pattern.search(url)
-            if match:
-                return match.group(1)
+        match = YouTubeService.URL_PATTERN.search(url)
+        if match:
+            return match.group(1)
 
         # Check if the URL itself is just a video ID
         is_valid, _ = YouTubeService.validate_video_id(url)
@@ -69,29 +114,10 @@ class YouTubeService:
 
             url = YouTubeService.construct_video_url(video_id)
 
-            # Use yt-dlp to get video info without downloading
-            cmd = [
-                'yt-dlp',
-                '--dump-json',
-                '--no-playlist',
-                '--skip-download',
-                url
-            ]
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
-                logger.error(f"yt-dlp error: {result.stderr}")
+            info = YouTubeService._extract_info(url, process=True)
+            if info is None:
                 return None
 
-            # Parse JSON output
-            info = json.loads(result.stdout)
-
             # Extract relevant metadata
             metadata = {
                 'video_id': info.get('id'),
@@ -122,54 +148,60 @@ class YouTubeService:
         finally:
             pass
 
+    @staticmethod
+    def _extract_info(url: str, process: bool) -> Optional[Dict]:
+
+        # In-process when yt-dlp is importable: no interpreter start-up and
+        # a warm extractor per thread. process=False skips format selection
+        # for callers that only read the raw format list
+        if yt_dlp is not None:
+            return _downloader().extract_info(url, download=False, process=process)
+
+        # Without the module, fall back to the yt-dlp executable on PATH
+        cmd = [
+            'yt-dlp',
+            '--dump-json',
+            '--no-playlist',
+            '--no-warnings',
+            '--skip-download',
+            '--cache-dir', Config.YTDLP_CACHE_DIR,
+            url
+        ]
+
+        # stdout stays bytes: the JSON runs to hundreds of KB and the parser
+        # reads bytes directly, so it is never decoded to str first
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            timeout=30
+        )
+
+        if result.returncode != 0:
+            logger.error(f"yt-dlp error: {result.stderr.decode(errors='replace')}")
+            return None
+
+        return _json_loads(result.stdout)
+
     @staticmethod
     def get_available_formats(video_id: str) -> Optional[list]:
 
         try:
-            import sys
-            import os
-
             url = YouTubeService.construct_video_url(video_id)
 
-            # Use yt-dlp to get video info with formats
-            cmd = [
-                sys.executable, '-m', 'yt_dlp',
-                '--dump-json',
-                '--no-warnings',
-                '--skip-download',
-                url
-            ]
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
-                logger.error(f"yt-dlp error: {result.stderr}")
+            # Only the raw format list is read, so format selection is skipped
+            info = YouTubeService._extract_info(url, process=False)
+            if info is None:
                 return None
 
-            # Parse the JSON output
-            info = json.loads(result.stdout)
-            formats = info.get('formats', [])
-
-            # Collect unique resolutions >= 720p
-            resolutions = set()
-
-            for fmt in formats:
-                height = fmt.get('height')
-
-                if height and height >= 720:
-                    resolution = f"{height}p"
-                    resolutions.add(resolution)
+            # Collect unique heights >= 720 as ints, so they sort without a
+            # key function and are only formatted at the end
+            heights = {
+                height for fmt in info.get('formats', [])
+                if (height := fmt.get('height')) and height >= 720
+            }
 
             # Return sorted list (highest first)
-            if resolutions:
-                return sorted(list(resolutions), key=lambda x: int(x[:-1]), reverse=True)
-            else:
-                return None
+            return [f"{height}p" for height in sorted(heights, reverse=True)] or None
 
         except Exception as e:
             logger.error(f"Failed to get available formats: {str(e)}")
@@ -201,13 +233,9 @@ class YouTubeService:
             bool: True if successful
         """
         try:
-            import sys
-
             # Construct command
             cmd = [
-                sys.executable, '-m', 'yt_dlp',
-                '--force-overwrites',
-                '--no-warnings',
+                *_YTDLP_SEGMENT_PREFIX,
                 '--download-sections', f"*{start_time}-{end_time}",
                 '--output', output_path
             ]
@@ -232,21 +260,22 @@ class YouTubeService:
 
             logger.info(f"Downloading segment start={start_time} end={end_time} to {output_path}")
 
-            # Execute
+            # Execute. Progress is not parsed here, so it is neither printed
+            # nor buffered; stderr is the only pipe, so it can be drained
+            # here, keeping just its tail for the error message
             process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True
             )
 
-            # Read progress if callback provided
-            # Note: For simplicity in this implementation we just wait,
-            # but real progress parsing would read stdout line by line
-            stdout, stderr = process.communicate()
+            stderr_tail = deque(process.stderr, maxlen=STDERR_TAIL_LINES)
+            process.stderr.close()
+            process.wait()
 
             if process.returncode != 0:
-                logger.error(f"yt-dlp download failed: {stderr}")
+                logger.error(f"yt-dlp download failed: {''.join(stderr_tail)}")
                 return False
 
             logger.info("Download completed successfully")
@@ -5,6 +5,11 @@ from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# watch, short-link, embed, /v/ and live URL forms as one alternation
+_YOUTUBE_URL_RE = re.compile(
+    r'(https?://)?(www\.)?(youtube\.com/(watch\?v=|embed/|v/|live/)|youtu\.be/)[\w-]+'
+)
+
 
 def validate_email(email: str) -> Tuple[bool, Optional[str]]:
     """
@@ -67,18 +72,8 @@ def validate_youtube_url(url: str) -> Tuple[bool, Optional[str]]:
     if not url:
         return False, "URL is required"
     
-    # YouTube URL patterns
-    patterns = [
-        r'(https?://)?(www\.)?(youtube\.com/watch\?v=[\w-]+)',
-        r'(https?://)?(www\.)?(youtu\.be/[\w-]+)',
-        r'(https?://)?(www\.)?(youtube\.com/embed/[\w-]+)',
-        r'(https?://)?(www\.)?(youtube\.com/v/[\w-]+)',
-        r'(https?://)?(www\.)?(youtube\.com/live/[\w-]+)',
-    ]
-    
-    for pattern in patterns:
-        if re.search(pattern, url):
-            return True, None
+    if _YOUTUBE_URL_RE.search(url):
+        return True, None
     
     return False, "Invalid YouTube URL"
 
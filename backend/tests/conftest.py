@@ -0,0 +1,117 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+# Manual scripts run with `python tests/<name>.py`; they download real videos
+# or need files in tests/videos/input, so pytest does not collect them
+collect_ignore = [
+    'test_download.py',
+    'test_encoding.py',
+    'test_format_detection.py',
+    'test_smart_download_logic.py',
+]
+
+
+class FakePipeline:
+    """Queues commands and applies them on execute(), like a non-transactional pipeline."""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        if self._client.before_execute:
+            self._client.before_execute()
+        with self._client.lock:
+            return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.Redis calls the services make (decode_responses=True)."""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.lock = threading.RLock()
+        # Called before a pipeline applies its commands; tests use it to hold
+        # a flush in flight or to make it fail
+        self.before_execute = None
+
+    def ping(self):
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        with self.lock:
+            return self.store.get(key)
+
+    def mget(self, keys):
+        with self.lock:
+            return [self.store.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        if isinstance(value, bytes):
+            value = value.decode()
+        with self.lock:
+            self.store[key] = value
+            self.ttls[key] = ex
+        return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def delete(self, *keys):
+        with self.lock:
+            removed = 0
+            for key in keys:
+                removed += self.store.pop(key, None) is not None
+                self.ttls.pop(key, None)
+            return removed
+
+    unlink = delete
+
+    def hincrby(self, key, field, amount):
+        with self.lock:
+            data = self.store.setdefault(key, {})
+            data[field] = str(int(data.get(field, 0)) + amount)
+            return int(data[field])
+
+    def hsetnx(self, key, field, value):
+        with self.lock:
+            data = self.store.setdefault(key, {})
+            if field in data:
+                return 0
+            data[field] = value if isinstance(value, str) else value.decode()
+            return 1
+
+    def hget(self, key, field):
+        with self.lock:
+            return self.store.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self.store.get(key, {}))
+
+    def expire(self, key, ttl):
+        with self.lock:
+            self.ttls[key] = ttl
+            return key in self.store
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+from src.services import progress_cache
+from src.services.progress_cache import ProgressCache
+
+
+@pytest.fixture
+def redis_progress(monkeypatch, fake_redis):
+    # Buffered mode against the fake client; the background flusher is not
+    # started, so each test flushes explicitly
+    monkeypatch.setattr(progress_cache, 'redis_client', fake_redis)
+    monkeypatch.setattr(progress_cache, '_redis_checked', True)
+    monkeypatch.setattr(progress_cache, '_in_flight', {})
+    progress_cache._pending.clear()
+    yield fake_redis
+    progress_cache._pending.clear()
+
+
+def test_flush_writes_latest_snapshot_with_ttl(redis_progress):
+    ProgressCache.set_progress('v1', {'download_progress': 10}, ttl=60)
+    ProgressCache.set_progress('v1', {'download_progress': 20}, ttl=60)
+
+    progress_cache._flush_pending()
+
+    assert redis_progress.ttls['video:progress:json:v1'] == 60
+    assert ProgressCache.get_progress('v1') == {'download_progress': 20}
+
+
+def test_delete_waits_for_in_flight_flush(redis_progress):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        entered.set()
+        release.wait(5)
+
+    redis_progress.before_execute = hold
+    ProgressCache.set_progress('v1', {'download_progress': 50})
+
+    flusher = threading.Thread(target=progress_cache._flush_pending)
+    flusher.start()
+    assert entered.wait(5)
+
+    deleter = threading.Thread(target=ProgressCache.delete_progress, args=('v1',))
+    deleter.start()
+    deleter.join(0.2)
+    # The batch holding v1 is still being written
+    assert deleter.is_alive()
+
+    release.set()
+    flusher.join(5)
+    deleter.join(5)
+
+    assert 'video:progress:json:v1' not in redis_progress.store
+    assert ProgressCache.get_progress('v1') is None
+
+
+def test_failed_flush_requeues_batch(redis_progress):
+    def fail():
+        raise ConnectionError("redis down")
+
+    redis_progress.before_execute = fail
+    ProgressCache.set_progress('v1', {'download_progress': 30})
+
+    progress_cache._flush_pending()
+
+    assert ProgressCache.get_progress('v1') == {'download_progress': 30}
+
+    redis_progress.before_execute = None
+    progress_cache._flush_pending()
+
+    assert 'video:progress:json:v1' in redis_progress.store
+    assert not progress_cache._pending
+
+
+def test_failed_flush_keeps_newer_snapshot(redis_progress):
+    def fail_after_update():
+        ProgressCache.set_progress('v1', {'download_progress': 90})
+        raise ConnectionError("redis down")
+
+    redis_progress.before_execute = fail_after_update
+    ProgressCache.set_progress('v1', {'download_progress': 30})
+
+    progress_cache._flush_pending()
+
+    assert ProgressCache.get_progress('v1') == {'download_progress': 90}
+
+
+def test_update_field_keeps_buffered_ttl(redis_progress):
+    ProgressCache.set_progress('v1', {'download_progress': 100}, ttl=120)
+    ProgressCache.update_field('v1', 'current_phase', 'merging')
+
+    progress_cache._flush_pending()
+
+    assert redis_progress.ttls['video:progress:json:v1'] == 120
+    assert ProgressCache.get_progress('v1') == {'download_progress': 100, 'current_phase': 'merging'}
+
+
+def test_worker_hash_is_read_and_never_overwritten(redis_progress):
+    # The worker HSETs the legacy key; the JSON snapshot lives beside it
+    redis_progress.store['video:progress:v1'] = {'status': 'downloading', 'download_progress': '12.5'}
+
+    assert ProgressCache.get_progress('v1') == {'status': 'downloading', 'download_progress': 12.5}
+
+    ProgressCache.set_progress('v1', {'download_progress': 40})
+    progress_cache._flush_pending()
+
+    assert redis_progress.store['video:progress:v1'] == {'status': 'downloading', 'download_progress': '12.5'}
+    assert ProgressCache.get_progress('v1') == {'download_progress': 40}
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from src.config import Config
+from src.services import rate_limiter_service
+from src.services.cache_service import CacheService
+from src.services.rate_limiter_service import RateLimiterService
+
+CLIENT = 'client-a'
+KEY = f"{RateLimiterService.KEY_PREFIX}{CLIENT}"
+
+
+@pytest.fixture
+def limiter(monkeypatch, fake_redis):
+    # Real CacheService over the fake client; the flusher thread is not
+    # started, so each test flushes explicitly
+    cache = CacheService()
+    monkeypatch.setattr(cache, '_client', fake_redis)
+    monkeypatch.setattr(cache, '_connected', True)
+    monkeypatch.setattr(rate_limiter_service, '_flusher_started', True)
+    monkeypatch.setattr(rate_limiter_service, '_in_flight_usage', {})
+    rate_limiter_service._pending_usage.clear()
+    rate_limiter_service._usage_cache.clear()
+    yield fake_redis
+    rate_limiter_service._pending_usage.clear()
+    rate_limiter_service._usage_cache.clear()
+
+
+def _increment(operation_type='clip'):
+    RateLimiterService.increment_usage(CLIENT, operation_type, '203.0.113.1', {'userAgent': 'test'})
+
+
+def test_increments_are_counted_before_and_after_flush(limiter):
+    _increment('clip')
+    _increment('encode')
+
+    assert RateLimiterService.get_usage(CLIENT) == 2
+    assert KEY not in limiter.store
+
+    rate_limiter_service._flush_usage()
+
+    assert limiter.store[KEY]['count'] == '2'
+    assert limiter.store[KEY]['clip_count'] == '1'
+    assert limiter.store[KEY]['encode_count'] == '1'
+    assert RateLimiterService.get_usage(CLIENT) == 2
+    assert RateLimiterService.get_remaining(CLIENT) == Config.PUBLIC_API_RATE_LIMIT - 2
+
+
+def test_failed_flush_keeps_usage(limiter):
+    def fail():
+        raise ConnectionError("redis down")
+
+    limiter.before_execute = fail
+    _increment()
+    rate_limiter_service._flush_usage()
+
+    assert RateLimiterService.get_usage(CLIENT) == 1
+
+    limiter.before_execute = None
+    rate_limiter_service._flush_usage()
+
+    assert limiter.store[KEY]['count'] == '1'
+
+
+def test_reset_waits_for_in_flight_flush(limiter):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        entered.set()
+        release.wait(5)
+
+    limiter.before_execute = hold
+    _increment()
+
+    flusher = threading.Thread(target=rate_limiter_service._flush_usage)
+    flusher.start()
+    assert entered.wait(5)
+
+    resetter = threading.Thread(target=RateLimiterService.reset_limit, args=(CLIENT,))
+    resetter.start()
+    resetter.join(0.2)
+    assert resetter.is_alive()
+
+    release.set()
+    flusher.join(5)
+    resetter.join(5)
+
+    assert KEY not in limiter.store
+    assert RateLimiterService.get_usage(CLIENT) == 0
+
+
+def test_get_usage_keeps_count_stored_by_concurrent_flush(limiter, monkeypatch):
+    limiter.hincrby(KEY, 'count', 3)
+    _increment()
+    real_hget = limiter.hget
+
+    def hget_racing_flush(key, field):
+        # The read sees the count before the pending increment lands, then
+        # the flush finishes and stores the newer total
+        stale = real_hget(key, field)
+        rate_limiter_service._flush_usage()
+        return stale
+
+    monkeypatch.setattr(limiter, 'hget', hget_racing_flush)
+
+    assert RateLimiterService.get_usage(CLIENT) == 4
+    assert rate_limiter_service._usage_cache[CLIENT][1] == 4
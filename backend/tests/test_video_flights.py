@@ -0,0 +1,187 @@
+import hashlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Config
+from src.services import video_service
+from src.services.cache_service import CacheService
+from src.services.video_service import VideoService
+
+URL = "https://www.youtube.com/watch?v=RQDCbgn2vDM"
+
+
+def _spy_on_waiters(flight) -> threading.Event:
+    # Signals once a follower is blocked on the flight, so the leader is only
+    # released after the follower has joined
+    waiting = threading.Event()
+    done = flight.done
+
+    class Spy:
+        def wait(self, timeout=None):
+            waiting.set()
+            return done.wait(timeout)
+
+        def set(self):
+            done.set()
+
+    flight.done = Spy()
+    return waiting
+
+
+def _wait_for_flight(flights: dict, key) -> object:
+    for _ in range(500):
+        flight = flights.get(key)
+        if flight is not None:
+            return flight
+        threading.Event().wait(0.01)
+    raise AssertionError("leader never registered its flight")
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(video_service, 'get_cache', lambda: SimpleNamespace(connected=False))
+    monkeypatch.setattr(Config, 'CLIP_CACHE_MAX_MB', 0)
+
+
+def test_concurrent_info_lookups_share_one_extraction(monkeypatch, no_cache):
+    release = threading.Event()
+    calls = []
+
+    class FakeDownloader:
+        def extract_info(self, url, download=True, process=True):
+            calls.append((url, download, process))
+            release.wait(5)
+            return {'title': 'Stream', 'duration': 42, 'thumbnail': 't.jpg', 'uploader': 'me'}
+
+    monkeypatch.setattr(video_service, 'yt_dlp', object())
+    monkeypatch.setattr(video_service, '_info_downloader', lambda: FakeDownloader())
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.setdefault('leader', VideoService.get_video_info(URL)))
+    leader.start()
+    waiting = _spy_on_waiters(_wait_for_flight(video_service._info_flights, URL))
+
+    follower = threading.Thread(target=lambda: results.setdefault('follower', VideoService.get_video_info(URL)))
+    follower.start()
+    assert waiting.wait(5)
+
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [(URL, False, False)]
+    assert results['leader'] == results['follower'] == {
+        'title': 'Stream', 'duration': 42, 'thumbnail': 't.jpg', 'uploader': 'me'
+    }
+    assert URL not in video_service._info_flights
+
+
+def test_follower_gets_its_own_copy_of_the_download(monkeypatch, no_cache, tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def fake_download(url, start_time, end_time, output_path, format_preference,
+                      resolution_preference, video_id, progress_callback, watchers):
+        # The live list: callers joining later add their watchers to it
+        calls.append(watchers)
+        release.wait(5)
+        with open(output_path, 'wb') as f:
+            f.write(b'clip')
+        return True, output_path, None
+
+    monkeypatch.setattr(VideoService, '_download_video_segment', staticmethod(fake_download))
+
+    leader_path = str(tmp_path / 'leader.mp4')
+    follower_path = str(tmp_path / 'follower.mp4')
+    key = (URL, 10, 20, 'mp4', '1080p')
+    results = {}
+
+    leader = threading.Thread(target=lambda: results.setdefault(
+        'leader', VideoService.download_video_segment(URL, 10, 20, leader_path, video_id='a')
+    ))
+    leader.start()
+    waiting = _spy_on_waiters(_wait_for_flight(video_service._download_flights, key))
+
+    follower_updates = []
+    follower = threading.Thread(target=lambda: results.setdefault(
+        'follower', VideoService.download_video_segment(
+            URL, 10, 20, follower_path, video_id='b', progress_callback=follower_updates.append
+        )
+    ))
+    follower.start()
+    assert waiting.wait(5)
+
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    # The follower's progress target joined the running download
+    assert [video_id for video_id, _ in calls[0]] == ['a', 'b']
+    assert results['leader'] == (True, leader_path, None)
+    assert results['follower'] == (True, follower_path, None)
+    with open(follower_path, 'rb') as f:
+        assert f.read() == b'clip'
+    # The follower hears the download finish, not only the leader
+    assert follower_updates[-1]['phase'] == "Complete"
+    assert key not in video_service._download_flights
+
+
+def test_follower_sees_leader_failure(monkeypatch, no_cache, tmp_path):
+    release = threading.Event()
+
+    def fake_download(*args):
+        release.wait(5)
+        return False, None, "yt-dlp failed (exit code 1)"
+
+    monkeypatch.setattr(VideoService, '_download_video_segment', staticmethod(fake_download))
+
+    key = (URL, 0, 5, 'mp4', '1080p')
+    results = {}
+
+    leader = threading.Thread(target=lambda: results.setdefault(
+        'leader', VideoService.download_video_segment(URL, 0, 5, str(tmp_path / 'a.mp4'))
+    ))
+    leader.start()
+    waiting = _spy_on_waiters(_wait_for_flight(video_service._download_flights, key))
+
+    follower = threading.Thread(target=lambda: results.setdefault(
+        'follower', VideoService.download_video_segment(URL, 0, 5, str(tmp_path / 'b.mp4'))
+    ))
+    follower.start()
+    assert waiting.wait(5)
+
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results['leader'] == results['follower'] == (False, None, "yt-dlp failed (exit code 1)")
+
+
+def test_batch_reads_hits_and_writes_misses_in_one_round(monkeypatch, fake_redis):
+    cache = CacheService()
+    monkeypatch.setattr(cache, '_client', fake_redis)
+    monkeypatch.setattr(cache, '_connected', True)
+    monkeypatch.setattr(video_service, 'get_cache', lambda: cache)
+
+    hit_url = URL + "&hit"
+    cache.set(video_service._VIDEO_INFO_PREFIX + hashlib.sha1(hit_url.encode()).hexdigest(), {'title': 'Cached'})
+    looked_up = []
+
+    def fake_fetch(url):
+        looked_up.append(url)
+        return None if url.endswith('gone') else {'title': url}
+
+    monkeypatch.setattr(VideoService, '_fetch_video_info', staticmethod(fake_fetch))
+    pipelines = []
+    real_pipeline = fake_redis.pipeline
+    monkeypatch.setattr(fake_redis, 'pipeline', lambda **kwargs: pipelines.append(1) or real_pipeline(**kwargs))
+
+    results = VideoService.get_video_info_batch([hit_url, URL, URL + "&gone", URL])
+
+    assert sorted(looked_up) == [URL, URL + "&gone"]
+    assert results == {hit_url: {'title': 'Cached'}, URL: {'title': URL}, URL + "&gone": None}
+    assert len(pipelines) == 1
+    assert cache.get(video_service._VIDEO_INFO_PREFIX + hashlib.sha1(URL.encode()).hexdigest()) == {'title': URL}
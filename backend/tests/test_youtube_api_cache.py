@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import youtube_api_service
+from src.services.youtube_api_service import YouTubeAPIService
+
+
+class FakeSession:
+    """Replays queued (status, body, headers) responses and records each request's headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append((url, dict(params or {}), dict(headers or {})))
+        status, body, response_headers = self.responses.pop(0)
+        return SimpleNamespace(
+            status_code=status,
+            json=lambda: body,
+            text='' if body is None else str(body),
+            headers=response_headers
+        )
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    youtube_api_service._lookup_cache.clear()
+    youtube_api_service._etag_cache.clear()
+    yield
+    youtube_api_service._lookup_cache.clear()
+    youtube_api_service._etag_cache.clear()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(*responses):
+        fake = FakeSession(*responses)
+        monkeypatch.setattr(YouTubeAPIService, '_http', staticmethod(lambda: fake))
+        return fake
+    return install
+
+
+def _video(video_id, live_chat_id):
+    return {'items': [{'id': video_id, 'liveStreamingDetails': {'activeLiveChatId': live_chat_id}}]}
+
+
+def test_lookup_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(youtube_api_service.time, 'monotonic', lambda: now[0])
+
+    youtube_api_service._store_lookup(('live_chat_id', 'vid', 'digest'), 'chat1')
+    assert youtube_api_service._cached_lookup(('live_chat_id', 'vid', 'digest'), 300) == 'chat1'
+
+    now[0] += 301
+    assert youtube_api_service._cached_lookup(('live_chat_id', 'vid', 'digest'), 300) is None
+
+
+def test_live_chat_id_is_cached_per_credential(session):
+    fake = session(
+        (200, _video('vid', 'chat1'), {}),
+        (200, _video('vid', 'chat1'), {}),
+    )
+
+    assert YouTubeAPIService.get_live_chat_id('vid', 'token-a') == 'chat1'
+    assert YouTubeAPIService.get_live_chat_id('vid', 'token-a') == 'chat1'
+    assert len(fake.requests) == 1
+
+    # Another token is not served from the first one's cache entry
+    assert YouTubeAPIService.get_live_chat_id('vid', 'token-b') == 'chat1'
+    assert len(fake.requests) == 2
+
+
+def test_conditional_get_revalidates_with_etag(session):
+    body = _video('vid', 'chat1')
+    fake = session(
+        (200, body, {'ETag': '"v1"'}),
+        (304, None, {}),
+    )
+    url = f"{YouTubeAPIService.API_BASE_URL}/videos"
+
+    assert YouTubeAPIService._conditional_get(url, {'id': 'vid', 'key': 'k'}, {}) == (200, body, '')
+    assert YouTubeAPIService._conditional_get(url, {'id': 'vid', 'key': 'k'}, {}) == (200, body, '')
+
+    assert 'If-None-Match' not in fake.requests[0][2]
+    assert fake.requests[1][2]['If-None-Match'] == '"v1"'
+
+
+def test_conditional_get_reports_errors_without_caching(session):
+    fake = session(
+        (403, None, {}),
+        (200, _video('vid', 'chat1'), {'ETag': '"v1"'}),
+    )
+    url = f"{YouTubeAPIService.API_BASE_URL}/videos"
+
+    status, data, _ = YouTubeAPIService._conditional_get(url, {'id': 'vid'}, {})
+    assert (status, data) == (403, None)
+
+    YouTubeAPIService._conditional_get(url, {'id': 'vid'}, {})
+    assert 'If-None-Match' not in fake.requests[1][2]
+
+
+def test_video_for_chat_skips_broadcast_and_search_calls(session):
+    fake = session((200, _video('vid', 'chat1'), {}))
+
+    assert YouTubeAPIService.get_live_chat_id('vid', 'token') == 'chat1'
+    assert YouTubeAPIService.get_video_id_from_live_chat('chat1', api_key='key') == 'vid'
+    assert len(fake.requests) == 1
+
+
+def test_search_probe_remembers_every_live_video(session):
+    fake = session(
+        (200, {'items': []}, {}),
+        (200, {'items': [{'id': {'videoId': 'v1'}}, {'id': {'videoId': 'v2'}}]}, {}),
+        (200, {'items': [
+            {'id': 'v1', 'liveStreamingDetails': {'activeLiveChatId': 'chat1'}},
+            {'id': 'v2', 'liveStreamingDetails': {'activeLiveChatId': 'chat2'}},
+        ]}, {}),
+    )
+
+    assert YouTubeAPIService.get_video_id_from_live_chat('chat1', api_key='key') == 'v1'
+    assert len(fake.requests) == 3
+
+    # chat2 was seen in the same probe, so no search is needed for it
+    assert YouTubeAPIService.get_video_id_from_live_chat('chat2', api_key='key') == 'v2'
+    assert len(fake.requests) == 3
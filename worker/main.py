@@ -33,7 +33,7 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Create temp directory
+# Create temp directory once; jobs write into it without re-checking
 os.makedirs(Config.TEMP_DIR, exist_ok=True)
 
 # Global flag for graceful shutdown
@@ -12,10 +12,32 @@ import uuid
 from datetime import datetime
 
 from config import Config
-from services import progress_service, storage_service, db_service
+from services import progress_service, storage_service, db_service, encoding_service
 
 logger = logging.getLogger(__name__)
 
+# Percent, then optional speed and ETA, from a yt-dlp progress line in one
+# scan; matched on the raw bytes so lines are never decoded
+_PROGRESS_RE = re.compile(rb'(\d+\.?\d*)%(?:.*?\bat\s+(\S+))?(?:.*?\bETA\s+(\S+))?')
+
+# Bytes requested per os.read() on the yt-dlp output pipe
+PIPE_READ_SIZE = 65536
+
+
+def _iter_lines(stream):
+    """Yield raw output lines, treating '\\r' progress redraws as line breaks."""
+    fd = stream.fileno()
+    buffer = b''
+    while True:
+        chunk = os.read(fd, PIPE_READ_SIZE)
+        if not chunk:
+            break
+        lines = (buffer + chunk.replace(b'\r', b'\n')).split(b'\n')
+        buffer = lines.pop()
+        yield from lines
+    if buffer:
+        yield buffer
+
 
 def download_video_segment(job_data):
     """
@@ -63,7 +85,6 @@ def download_video_segment(job_data):
     file_ext = format_pref if format_pref != 'best' else 'mp4'
     filename = f"{uuid.uuid4().hex}_{int(datetime.utcnow().timestamp())}.{file_ext}"
     output_path = os.path.join(Config.TEMP_DIR, filename)
-    os.makedirs(Config.TEMP_DIR, exist_ok=True)
 
     try:
         # Build yt-dlp command
@@ -96,21 +117,15 @@ def download_video_segment(job_data):
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
+            bufsize=0,
         )
 
-        for line in process.stdout:
-            line = line.strip()
-            if not line:
-                continue
-
+        for line in _iter_lines(process.stdout):
             # Parse download progress
-            progress_match = re.search(r'(\d+\.?\d*)%', line)
+            progress_match = _PROGRESS_RE.search(line) if b'%' in line else None
             if progress_match:
-                download_pct = float(progress_match.group(1))
-                speed_match = re.search(r'at\s+(\S+)', line)
-                eta_match = re.search(r'ETA\s+(\S+)', line)
+                pct_str, speed, eta = progress_match.groups()
+                download_pct = float(pct_str)
 
                 progress_data = {
                     'status': 'processing',
@@ -118,10 +133,10 @@ def download_video_segment(job_data):
                     'download_progress': min(download_pct, 100),
                     'encoding_progress': 0,
                 }
-                if speed_match:
-                    progress_data['speed'] = speed_match.group(1)
-                if eta_match:
-                    progress_data['eta'] = eta_match.group(1)
+                if speed:
+                    progress_data['speed'] = speed.decode('ascii', 'replace')
+                if eta:
+                    progress_data['eta'] = eta.decode('ascii', 'replace')
 
                 progress_service.set_progress(job_id, progress_data)
                 progress_service.set_video_progress(video_id, progress_data)
@@ -182,6 +197,7 @@ def download_video_segment(job_data):
                 stderr=subprocess.PIPE,
                 text=True,
             )
+            stderr_tail = encoding_service.start_stderr_tail(enc_process)
 
             for line in enc_process.stdout:
                 if 'out_time_ms=' in line:
@@ -213,8 +229,7 @@ def download_video_segment(job_data):
                 pass
 
             if enc_process.returncode != 0:
-                stderr = enc_process.stderr.read()
-                return False, f"Encoding failed: {stderr[:500]}"
+                return False, f"Encoding failed: {stderr_tail()[-500:]}"
 
             output_path = encoded_path
 
@@ -272,7 +287,12 @@ def download_video_segment(job_data):
         return False, error_msg
 
 
-def _build_format_string(resolution, format_ext):
+# Muxed mp4 streams only exist at low resolutions; at or below this height a
+# progressive stream of exactly the requested height is tried before merging
+_PROGRESSIVE_MAX_HEIGHT = 720
+
+
+def _format_string_for(resolution, format_ext):
     """Build yt-dlp format selection string."""
     if resolution == 'best':
         if format_ext == 'mp4':
@@ -290,8 +310,29 @@ def _build_format_string(resolution, format_ext):
         height = 1080
 
     if format_ext == 'mp4':
-        return f'bv*[height<={height}][ext=mp4]+ba[ext=m4a]/bv*[height<={height}]+ba/b[height<={height}]'
+        merged = f'bv*[height<={height}][ext=mp4]+ba[ext=m4a]/bv*[height<={height}]+ba/b[height<={height}]'
+        if height <= _PROGRESSIVE_MAX_HEIGHT:
+            # Already muxed, so yt-dlp skips the FFmpeg merge pass
+            return f'b[height={height}][ext=mp4]/{merged}'
+        return merged
     elif format_ext == 'webm':
         return f'bv*[height<={height}][ext=webm]+ba[ext=webm]/bv*[height<={height}]+ba/b[height<={height}]'
     else:
         return f'bv*[height<={height}]+ba/b[height<={height}]'
+
+
+# Format strings for the resolutions and containers the app offers, built
+# once at import; other combinations go through _format_string_for
+_FORMAT_STRINGS = {
+    (resolution, format_ext): _format_string_for(resolution, format_ext)
+    for resolution in ('best', '2160p', '1440p', '1080p', '720p', '480p', '360p')
+    for format_ext in ('mp4', 'webm', 'best')
+}
+
+
+def _build_format_string(resolution, format_ext):
+    """Look up the yt-dlp format selection string for a job."""
+    format_string = _FORMAT_STRINGS.get((resolution, format_ext))
+    if format_string is None:
+        format_string = _format_string_for(resolution, format_ext)
+    return format_string
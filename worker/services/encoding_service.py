@@ -8,6 +8,8 @@ import logging
 import subprocess
 import json
 import uuid
+import threading
+from collections import deque
 from datetime import datetime
 
 from config import Config
@@ -15,6 +17,30 @@ from services import progress_service, storage_service, db_service
 
 logger = logging.getLogger(__name__)
 
+# Lines of ffmpeg stderr kept for the error message of a failed run
+STDERR_TAIL_LINES = 50
+
+
+def start_stderr_tail(process):
+    """
+    Drain a process's stderr on a background thread, keeping only its tail.
+
+    ffmpeg keeps writing stats to stderr while stdout is being read, so an
+    undrained pipe eventually fills and stalls it.
+
+    Returns:
+        Callable that waits for stderr to close and returns the kept lines
+    """
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+    reader = threading.Thread(target=tail.extend, args=(process.stderr,), daemon=True)
+    reader.start()
+
+    def result():
+        reader.join()
+        return ''.join(tail)
+
+    return result
+
 # CPU Codec configurations
 CPU_CODEC_CONFIGS = {
     'h264': {
@@ -84,8 +110,6 @@ def encode_video(job_data):
         'encoding_progress': 0,
     })
 
-    os.makedirs(Config.TEMP_DIR, exist_ok=True)
-
     # Download source file from S3
     input_ext = os.path.splitext(original_filename)[1] or '.mp4'
     local_input = os.path.join(Config.TEMP_DIR, f"input_{uuid.uuid4().hex}{input_ext}")
@@ -144,6 +168,7 @@ def encode_video(job_data):
             stderr=subprocess.PIPE,
             text=True,
         )
+        stderr_tail = start_stderr_tail(process)
 
         for line in process.stdout:
             if 'out_time_ms=' in line:
@@ -182,8 +207,7 @@ def encode_video(job_data):
             pass
 
         if process.returncode != 0:
-            stderr = process.stderr.read()
-            error = f"ffmpeg exited with code {process.returncode}: {stderr[:500]}"
+            error = f"ffmpeg exited with code {process.returncode}: {stderr_tail()[-500:]}"
             logger.error(f"[Encode] {error}")
             return False, error
 
@@ -3,7 +3,10 @@ Progress service for writing job progress to Redis.
 The API server reads from these same Redis keys.
 """
 import json
+import time
+import atexit
 import logging
+import threading
 import redis
 
 from config import Config
@@ -12,6 +15,19 @@ logger = logging.getLogger(__name__)
 
 _redis_client = None
 
+# Progress lines arrive many times a second; only the latest fields per key
+# are written, in one pipeline per interval. Terminal states go out at once.
+FLUSH_INTERVAL_SECONDS = 0.5
+_TERMINAL_STATUSES = ('completed', 'failed')
+
+# key -> (fields, ttl) awaiting the next flush
+_pending = {}
+_pending_lock = threading.Lock()
+# Serializes flushes so an older batch never lands after a newer one; held
+# by delete_progress so a batch being written cannot re-create a deleted key
+_flush_lock = threading.Lock()
+_flusher_started = False
+
 
 def get_redis():
     """Get Redis client."""
@@ -27,6 +43,63 @@ def get_redis():
     return _redis_client
 
 
+def flush():
+    """Write all buffered progress to Redis in one pipeline."""
+    with _flush_lock:
+        with _pending_lock:
+            batch = dict(_pending)
+            _pending.clear()
+        if not batch:
+            return True
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key, (fields, ttl) in batch.items():
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to flush progress for {len(batch)} key(s): {e}")
+            # Requeue for the next flush; fields queued meanwhile are newer
+            # and win over the failed batch's values
+            with _pending_lock:
+                for key, (fields, ttl) in batch.items():
+                    newer = _pending.get(key)
+                    if newer:
+                        fields.update(newer[0])
+                        ttl = newer[1]
+                    _pending[key] = (fields, ttl)
+            return False
+
+
+def _flush_loop():
+    """Background flusher started on first progress write."""
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        flush()
+
+
+def _queue(key, progress_data, ttl):
+    """Merge progress into the pending fields for key, as HSET would."""
+    global _flusher_started
+
+    # Convert all values to strings for Redis hash
+    str_data = {k: str(v) for k, v in progress_data.items()}
+    with _pending_lock:
+        if not _flusher_started:
+            _flusher_started = True
+            threading.Thread(target=_flush_loop, name='progress-flusher', daemon=True).start()
+            atexit.register(flush)
+        fields, _ = _pending.get(key, ({}, ttl))
+        fields.update(str_data)
+        _pending[key] = (fields, ttl)
+
+    if progress_data.get('status') in _TERMINAL_STATUSES:
+        return flush()
+    return True
+
+
 def set_progress(job_id, progress_data, ttl=86400):
     """
     Set progress data for a job.
@@ -34,14 +107,7 @@ def set_progress(job_id, progress_data, ttl=86400):
     Also writes to legacy key `video:progress:{video_id}` for backward compat.
     """
     try:
-        r = get_redis()
-        key = f"job:{job_id}:progress"
-
-        # Convert all values to strings for Redis hash
-        str_data = {k: str(v) for k, v in progress_data.items()}
-        r.hset(key, mapping=str_data)
-        r.expire(key, ttl)
-        return True
+        return _queue(f"job:{job_id}:progress", progress_data, ttl)
     except Exception as e:
         logger.error(f"Failed to set progress for job {job_id}: {e}")
         return False
@@ -53,12 +119,7 @@ def set_video_progress(video_id, progress_data, ttl=86400):
     This ensures backward compatibility with the API server's progress reading.
     """
     try:
-        r = get_redis()
-        key = f"video:progress:{video_id}"
-        str_data = {k: str(v) for k, v in progress_data.items()}
-        r.hset(key, mapping=str_data)
-        r.expire(key, ttl)
-        return True
+        return _queue(f"video:progress:{video_id}", progress_data, ttl)
     except Exception as e:
         logger.error(f"Failed to set video progress for {video_id}: {e}")
         return False
@@ -67,8 +128,13 @@ def set_video_progress(video_id, progress_data, ttl=86400):
 def delete_progress(job_id):
     """Delete progress data for a job."""
     try:
-        r = get_redis()
-        r.delete(f"job:{job_id}:progress")
+        key = f"job:{job_id}:progress"
+        # Waits out a flush in progress, which may hold this key
+        with _flush_lock:
+            with _pending_lock:
+                _pending.pop(key, None)
+            r = get_redis()
+            r.delete(key)
         return True
     except Exception as e:
         logger.error(f"Failed to delete progress for job {job_id}: {e}")